@@ -1,5 +1,13 @@
 import numpy as np
 from collections import deque
+import heapq
+import timeit
+from floodfill import flood_fill, flood_fill_rounds, distance_dtype
+from walltables import wall_bits, heading_offsets, rotation_deltas, heading_rotations, cell_walls, open_headings, dead_end
+from walltables import map_walls, passable, passable_table
+from pruning import fill_dead_ends, keep_mask
+
+timer = timeit.default_timer
 
 class Algorithm(object):
     """
@@ -11,7 +19,12 @@ class Algorithm(object):
         start:       robot starting location, defaults to (0,0)
         exploring:   track current simulation phase: exploration / speed
         map_layers:  number of layers being used to track cell specific information
-        maze:         uint8 numpy array representing all data known by the algorithm about the maze
+        maze:         numpy array representing all data known by the algorithm about the maze
+        map_dtype:   unsigned integer type of the maze and waterfall maps, the smallest one holding any distance
+                     in a maze of this size with room left for the sentinels below
+        no_pass:     sentinel neighbor value for a heading blocked by a wall, above any distance or visit count
+        dead_end_visits: sentinel visit count marking dead ends, so they are entered only when nothing else is open
+        visit_limit: value at which visit counters saturate instead of wrapping around
         valid_walls: array listing bit values for walls, North, East, South, West respectively
         cell_walls:  array of values taken from valid_walls representing present walls 
         cell:        integer sum of cell_walls for a given cell in the map
@@ -20,8 +33,17 @@ class Algorithm(object):
         rotation:    one of [-90, 0, 90] indicating turn or straight.
         movement:    integer from 0 - 3 inclusive, indicating the number of cells to move in the new direction.
         transform:   integer tuple that can be added to a location to move it one cell in the direction of heading
+        changed_cells: set of locations that have gained a wall since the map derived from them was last refreshed
+        stats:       counts of the expensive planning calls made so far: full waterfall updates, waterfall repairs
+                     and route searches, read by instrumentation to attribute time to recomputations
+        truth:       read-only view of the true Maze.walls grid when the algorithm is given the maze, else None
+        map_version: number of wall bits added to the map so far; anything derived from the map can be checked
+                     against it to tell whether the map changed since
+        anytime:     class constant, True for the algorithms whose constructor takes a step_budget, the planning
+                     time per step in seconds, and which then plan in anytime mode
     
     """
+    anytime = False
     
     
     def __init__(self, maze_dim, goal, start=(0,0)):
@@ -30,9 +52,17 @@ class Algorithm(object):
         self.goal = goal
         self.start = start
         self.exploring = True
+        self.map_dtype = distance_dtype(maze_dim * maze_dim + 2) # room for the two sentinels above the distances
+        self.no_pass = int(np.iinfo(self.map_dtype).max)
+        self.dead_end_visits = self.no_pass - 1
+        self.visit_limit = self.dead_end_visits - 1
         self.maze = self.blank_maze(maze_dim, map_layers=2, goal=self.goal)
-        self.valid_walls = [1, 2, 4, 8]
-        self.dead_ends = [7, 11, 13, 14]
+        self.valid_walls = list(wall_bits)
+        self.dead_ends = [cell for cell in range(16) if dead_end[cell]]
+        self.changed_cells = set()
+        self.stats = {'waterfall_updates': 0, 'waterfall_repairs': 0, 'route_plans': 0}
+        self.truth = None
+        self.map_version = 0
         
         
     def algorithm_choice(self, walls = list(), heading=0, location =(0, 0)):
@@ -42,7 +72,7 @@ class Algorithm(object):
             return 'Reset', 'Reset'
 
         self.maze = self.update_maze(self.maze, walls, location)
-        self.maze[location[0], location[1], 1] += 1 # Update visits to the current cell
+        self.count_visit(self.maze, location) # Update visits to the current cell
         
         visits = self.get_visits(self.maze, location)
         if visits[(heading + 3) % 4] == min(visits): # If turning left is an option, and best or tied for best, turn left.
@@ -58,7 +88,7 @@ class Algorithm(object):
     def blank_maze(self, maze_dim, map_layers, goal):
         """ Create a blank map of the maze. Fill in outer walls. """
         
-        maze = np.zeros((maze_dim, maze_dim, map_layers), dtype=np.uint8)
+        maze = np.zeros((maze_dim, maze_dim, map_layers), dtype=self.map_dtype)
         # Fill in outer walls
         maze[:, -1, 0] += 1 # North
         maze[:, 0, 0] += 4 # South
@@ -74,88 +104,89 @@ class Algorithm(object):
             if wall == 0: # If this cell has a wall in the given direction.
                 x = location[0]
                 y = location[1]
-                maze[x, y, 0] = self.mark_wall(maze[x, y, 0], w) # Mark visible wall
+                if not maze[x, y, 0] & wall_bits[w]: # Mark visible wall
+                    maze[x, y, 0] |= wall_bits[w]
+                    self.note_wall(x, y)
 
-                transform = self.decode_heading(w)                
+                transform = heading_offsets[w]
                 x += transform[0]
                 y += transform[1]
                 if (x < maze.shape[0]) and (x >= 0) and (y < maze.shape[1]) and (y >= 0):
-                    maze[x, y, 0] = self.mark_wall(maze[x, y, 0], (w+2)%4) # Mark other side of visible wall
+                    if not maze[x, y, 0] & wall_bits[(w+2)%4]: # Mark other side of visible wall
+                        maze[x, y, 0] |= wall_bits[(w+2)%4]
+                        self.note_wall(x, y)
         return maze
 
+
+    def note_wall(self, x, y):
+        """ Record that cell x, y gained a wall: it joins changed_cells and the map version moves on. """
+
+        self.changed_cells.add((x, y))
+        self.map_version += 1
+
     
     def decode_cell(self, cell):
-        """ Decode cell wall value and add flag value if not already present. """
+        """ Decode cell wall value into the list of wall bits present, lowest first. """
         
-        reversed_walls = list(self.valid_walls)
-        reversed_walls.reverse()
-        cell_walls = list()
-        for heading in reversed_walls:
-            if cell >= heading:
-                cell -= heading
-                cell_walls.append(heading)
-        cell_walls.reverse()
-        return cell_walls
+        return list(cell_walls[cell])
 
     
     def mark_wall(self, cell, heading):
         """ Determine if a wall is already mapped at a given heading, if not, add it. """
 
-        assert 2**heading in self.valid_walls  # Throw error on invalid heading values
-        cell_walls = self.decode_cell(cell)
-        if 2**heading not in cell_walls:
-            cell_walls.append(2**heading)
-        return sum(cell_walls)
+        assert heading in range(4)  # Throw error on invalid heading values
+        return cell | wall_bits[heading]
 
     
     def decode_heading(self, heading):
         """ Convert directional heading into coordinate transformation. Addition with a location 
             transforms that location by 1 cell in the direction of the given heading. """
         
-        if heading == 0: return (0, 1)
-        if heading == 1: return (1, 0)
-        if heading == 2: return (0, -1)
-        if heading == 3: return (-1, 0)
+        return heading_offsets[heading]
     
     
     def get_visits(self, maze, location):
         """ Return the number of visits to each adjoining cell, organized by heading. """
         
-        cell_walls = self.decode_cell(maze[location[0], location[1], 0])
-        visits = [255,255,255,255]
-        for w, wall in enumerate(self.valid_walls):
-            if wall not in cell_walls:
-                transform = self.decode_heading(w)
-                x = location[0] + transform[0]
-                y = location[1] + transform[1]
-                if maze[x,y,0] in self.dead_ends:
-                    maze[x,y,1] = 250
-                visits[w] = maze[x, y, 1]
+        visits = [self.no_pass] * 4
+        for w in open_headings[maze[location[0], location[1], 0]]:
+            transform = heading_offsets[w]
+            x = location[0] + transform[0]
+            y = location[1] + transform[1]
+            if dead_end[maze[x,y,0]]:
+                maze[x,y,1] = self.dead_end_visits
+            visits[w] = maze[x, y, 1]
         return visits
 
+
+    def count_visit(self, maze, location):
+        """ Add a visit to the cell at location, saturating at visit_limit rather than wrapping around. """
+
+        if maze[location[0], location[1], 1] < self.visit_limit:
+            maze[location[0], location[1], 1] += 1
+
         
+    def maze_oracle(self, maze):
+        """ Accept maze object and fill in the internal maze to match. The true wall grid is kept as a shared
+            read-only view of Maze.walls and translated into the wall layer of the map in one step. Only uint8
+            walls, as loaded from binary maze files, are translated without a copy; text mazes hold int64 walls,
+            which map_walls first casts to a temporary uint8 array. """
+
+        self.truth = maze.walls.view()
+        self.truth.flags.writeable = False
+        map_walls(self.truth, out=self.maze[:, :, 0])
+        return True
+
+
     def heading_to_rotation(self, heading, new_heading):
         """ Determine implied rotation between two headings. """
-        if heading == new_heading:
-            rotate = 0
-        elif (heading+1)%4 == new_heading:
-            rotate = 90
-        elif (heading+3)%4 == new_heading:
-            rotate = -90
-        else:
-            rotate = "None"
-        return rotate
+        return heading_rotations[heading][new_heading]
     
     
     def decode_rotation(self, heading, rotation):
         """ Change provided heading according to provided rotation. """
-        assert rotation in [-90, 0, 90]
-        if rotation == 0:
-            return heading
-        if rotation == 90:
-            return (heading+1)%4
-        if rotation == -90:
-            return (heading+3)%4
+        assert rotation in rotation_deltas
+        return (heading + rotation_deltas[rotation]) % 4
     
     
     def get_name(self):
@@ -166,14 +197,38 @@ class Algorithm(object):
 
 
 class Waterfall(Algorithm): # Basic waterfall
+    """
+    Attributes added to those of Algorithm:
+        cell_versions: map_version at which each cell last gained a wall, 0 for cells without new walls
+        known:       bit mask per cell of the sides whose state (wall or open) has been observed, in the same bit
+                     order as the walls; filled by observe_sensors, starting with the outer walls
+        known_version: number of observe_sensors calls that learned something new
+        keep:        mask of the start and goal cells, which dead-end pruning never fills
+        pruned:      copy of the wall layer with dead-end branches filled in, see prune_map
+        dead_cells:  mask of the cells filled in pruned, which no route between start and goal can use
+        stats:       also counts the flood fills of route_bounds
+    
+    """
     def __init__(self, maze_dim, goal, start = (0, 0)):
         super(Waterfall, self).__init__(maze_dim, goal, start)
         # Set state (Exploration / Speed)
         self.name = "Basic Waterfall"
         self.maze = self.blank_maze(maze_dim, map_layers=1, goal=goal)
         self.plan = deque()
+        self.waterfall = None
+        self.waterfall_goal = None
+        self.waterfall_pruned = False
+        self.waterfall_dead = None
         self.laps = maze_dim - 9
         self.current_lap = self.laps
+        self.stats['bound_fills'] = 0
+        self.cell_versions = np.zeros((maze_dim, maze_dim), dtype=np.int64)
+        self.known = self.blank_maze(maze_dim, map_layers=1, goal=goal)[:, :, 0].astype(np.uint8)
+        self.known_version = 0
+        self.keep = keep_mask((maze_dim, maze_dim), list(goal) + [start])
+        self.pruned = None
+        self.dead_cells = None
+        self.pruned_version = 0
     
     def algorithm_choice(self, walls = list(), heading=0, location = (0, 0)):
         """ Determine the next action to take in searching for the goal. """
@@ -182,7 +237,7 @@ class Waterfall(Algorithm): # Basic waterfall
             target = list(self.goal)
         else:
             target = [self.start]
-        waterfall = self.waterfall_update(self.maze, target)
+        waterfall = self.waterfall_refresh(target, location)
         if self.exploring:
             if (location in target): # If goal has been reached and back at start, end run.
                 self.laps -= 1
@@ -199,7 +254,7 @@ class Waterfall(Algorithm): # Basic waterfall
             for i in range(3):
                 rotate, move = self.waterfall_choice(waterfall, h, (x, y))
                 h = self.decode_rotation(h, rotate)
-                transform = self.decode_heading(h)
+                transform = heading_offsets[h]
                 x += transform[0]
                 y += transform[1]
                 if i == 0:
@@ -227,17 +282,19 @@ class Waterfall(Algorithm): # Basic waterfall
 
 
     def waterfall_neighbors(self, waterfall, location, all=False):
-        """ Examine the neighboring cells and return those which are equally good choices """
+        """ Examine the neighboring cells and return those which are equally good choices. Neighbors cut off
+            from the goal (0), such as dead-end branches walled off in a pruned waterfall, are no choice unless the
+            current cell is cut off too. """
         maze_size = waterfall.shape[0]
         current = waterfall[location[0], location[1]]
-        walls = self.decode_cell(self.maze[location[0], location[1], 0])
+        open_sides = passable[self.maze[location[0], location[1], 0]]
         neighbors = list()
-        no_pass = 255
+        no_pass = self.no_pass
         for i in range(4):
-            transform = self.decode_heading(i)
+            transform = heading_offsets[i]
             x = location[0] + transform[0]
             y = location[1] + transform[1]
-            if (max((x, y)) < maze_size) and (2**i not in walls):
+            if (max((x, y)) < maze_size) and (open_sides & wall_bits[i]) and (waterfall[x, y] or not current):
                 neighbors.append(waterfall[x, y])
             else:
                 neighbors.append(no_pass)
@@ -249,40 +306,208 @@ class Waterfall(Algorithm): # Basic waterfall
     
     def waterfall_update(self, maze, goal=None):
         """ Update the waterfall map to reflect new information. To return to start, recalcuate the map from start. """
-        maze_size = maze.shape[0]
-        center = maze_size // 2
-        waterfall = np.zeros((maze_size, maze_size), dtype=np.uint8)
-        if goal == None:
+        if goal is None:
             goal = self.goal
-        stack = list(goal)
-        for cell in stack:
-            waterfall[cell[0], cell[1]] = 1
-            
-        while len(stack) > 0:
-            loc = stack.pop(0)
-            walls = self.decode_cell(maze[loc[0], loc[1], 0])
-            for i in range(4):
-                transform = self.decode_heading(i)
+        self.stats['waterfall_updates'] += 1
+        return flood_fill(maze[:, :, 0], goal, self.map_dtype)
+
+
+    def waterfall_refresh(self, goal=None, location=None):
+        """ Return the persistent waterfall map of the algorithm's own maze. The map is rebuilt when the goal or
+            the wall layer it is filled on (see waterfall_layer) has to change, repaired around newly walled cells
+            when walls were found, and reused untouched otherwise. A map on the full layer only moves to the
+            pruned one when it is rebuilt for a new goal anyway. On the pruned layer, cells pruned since the last
+            refresh and their neighbors are repaired as well. """
+        if goal is None:
+            goal = self.goal
+        goal = tuple(goal)
+        walls, pruned = self.waterfall_layer(goal, location)
+        if (self.waterfall is not None) and (goal == self.waterfall_goal) and self.waterfall_pruned < pruned:
+            walls, pruned = self.maze[:, :, 0], False # Keep the full map rather than rebuild it
+        if (self.waterfall is None) or (goal != self.waterfall_goal) or (pruned != self.waterfall_pruned):
+            self.waterfall = self.waterfall_update(walls[:, :, None], goal)
+            self.waterfall_goal = goal
+            self.waterfall_pruned = pruned
+        else:
+            cells = self.changed_cells
+            if pruned:
+                cells = cells | self.pruned_cells(self.dead_cells & ~self.waterfall_dead)
+            if cells:
+                self.waterfall = self.waterfall_repair(self.waterfall, walls[:, :, None], goal, cells)
+        if pruned:
+            self.waterfall_dead = self.dead_cells.copy()
+        self.changed_cells = set()
+        return self.waterfall
+
+
+    def waterfall_layer(self, goal, location=None):
+        """ Choose the wall layer to fill the waterfall for goal on: the pruned layer (see prune_map) when the
+            location and the goal cells all lie outside the known dead-end branches, which it walls off, and the
+            full wall layer otherwise or without a location. Returns the layer and whether it is the pruned one. """
+        if location is None:
+            return self.maze[:, :, 0], False
+        pruned, dead_cells = self.prune_map()
+        cells = tuple(np.array(list(goal) + [tuple(location)]).T)
+        if dead_cells[cells].any():
+            return self.maze[:, :, 0], False
+        return pruned, True
+
+
+    def pruned_cells(self, dead):
+        """ The cells of the given mask and their neighbors, whose walls changed when the mask was pruned. """
+        cells = set()
+        size = dead.shape[0]
+        for x, y in zip(*np.nonzero(dead)):
+            cells.add((int(x), int(y)))
+            for transform in heading_offsets:
+                nx, ny = int(x) + transform[0], int(y) + transform[1]
+                if (0 <= nx < size) and (0 <= ny < size):
+                    cells.add((nx, ny))
+        return cells
+
+
+    def waterfall_repair(self, waterfall, maze, goal, cells):
+        """ Modified flood fill: starting from the given cells, reset every cell whose value is no longer one more
+            than its lowest open neighbor and recheck that cell's neighbors. Walls are only ever added, so
+            changes stay local to the routes that used the new walls. Cells cut off from the goal count up to
+            the cell limit and then drop to 0 (unreachable); if that happens too often, the map is rebuilt. """
+        self.stats['waterfall_repairs'] += 1
+        limit = maze.shape[0] * maze.shape[1]
+        goal = set(goal)
+        stack = deque(cells)
+        checks = 0
+        while stack:
+            checks += 1
+            if checks > 4 * limit:
+                return self.waterfall_update(maze, goal)
+            loc = stack.popleft()
+            if loc in goal:
+                continue
+            neighbors = list()
+            lowest = 0
+            for i in open_headings[maze[loc[0], loc[1], 0]]:
+                transform = heading_offsets[i]
                 x = loc[0] + transform[0]
                 y = loc[1] + transform[1]
-                if (max((x,y)) < maze_size) and (2**i not in walls):
-                    if waterfall[x, y] == 0:
-                        new_loc = (x, y)
-                        stack.append(new_loc)
-                        waterfall[x, y] = waterfall[loc[0], loc[1]] + 1
+                neighbors.append((x, y))
+                value = int(waterfall[x, y])
+                if value and (not lowest or value < lowest):
+                    lowest = value
+            value = lowest + 1 if (lowest and lowest < limit) else 0
+            if value != waterfall[loc[0], loc[1]]:
+                waterfall[loc[0], loc[1]] = value
+                stack.extend(neighbors)
         return waterfall
-    
+
+
+    def note_wall(self, x, y):
+        """ Record that cell x, y gained a wall, along with the map version at which it did. """
+
+        super(Waterfall, self).note_wall(x, y)
+        self.cell_versions[x, y] = self.map_version
+
+
+    def maze_oracle(self, maze):
+        """ Accept maze object like Algorithm.maze_oracle, and drop the pruned copy of the replaced wall layer. """
+
+        super(Waterfall, self).maze_oracle(maze)
+        self.pruned = None
+        return True
+
+
+    def observe_sensors(self, walls, location):
+        """ Record everything the sensor rays show: every side a ray passes through is known to be open, and the
+            side where it stops is a known wall, however far away. Walls found this way are added to the map
+            like adjacent ones. Returns True if anything new was learned. """
+
+        maze = self.maze
+        before = self.known_version
+        for w, distance in enumerate(walls):
+            if distance < 0: # Blind spot
+                continue
+            transform = heading_offsets[w]
+            opposite = (w + 2) % 4
+            x, y = location
+            for step in range(distance + 1):
+                nx = x + transform[0]
+                ny = y + transform[1]
+                inside = (0 <= nx < maze.shape[0]) and (0 <= ny < maze.shape[1])
+                if not self.known[x, y] & wall_bits[w]:
+                    self.known[x, y] |= wall_bits[w]
+                    self.known_version = before + 1
+                    if inside:
+                        self.known[nx, ny] |= wall_bits[opposite]
+                    if step == distance and not maze[x, y, 0] & wall_bits[w]:
+                        maze[x, y, 0] |= wall_bits[w]
+                        self.note_wall(x, y)
+                        if inside:
+                            maze[nx, ny, 0] |= wall_bits[opposite]
+                            self.note_wall(nx, ny)
+                x, y = nx, ny
+        return self.known_version != before
+
+
+    def bound_maps(self):
+        """ Optimistic and pessimistic wall layers of the map: unknown sides are treated as open in the first
+            and as walls in the second, so any route open in the pessimistic map is certain to exist. """
+
+        optimistic = self.prune_map()[0]
+        pessimistic = optimistic | passable_table[self.known] # The sides not yet known, as walls
+        return optimistic, pessimistic
+
+
+    def route_bounds(self, goal=None, start=None):
+        """ Lengths in cells of the shortest route from start to goal on the optimistic and the pessimistic map.
+            The true shortest route lies between the two; 0 means the goal is unreachable on that map. """
+
+        if goal is None:
+            goal = self.goal
+        if start is None:
+            start = self.start
+        optimistic, pessimistic = self.bound_maps()
+        self.stats['bound_fills'] += 2
+        return (int(flood_fill(optimistic, goal)[start[0], start[1]]),
+                int(flood_fill(pessimistic, goal)[start[0], start[1]]))
+
+
+    def prune_map(self):
+        """ Return the wall layer with its dead-end branches filled in, start and goal kept, along with the mask
+            of filled cells. Routes between start and goal never enter those branches, so flood fills and route
+            searches over the pruned layer do less work. The pruned copy is built once and then kept up to date
+            by rechecking only the cells that gained walls since. """
+
+        if self.pruned is None:
+            self.pruned = np.array(self.maze[:, :, 0])
+            self.dead_cells = fill_dead_ends(self.pruned, self.keep)
+        elif self.pruned_version != self.map_version:
+            cells = np.nonzero(self.cell_versions > self.pruned_version)
+            self.pruned[cells] |= self.maze[:, :, 0][cells]
+            self.dead_cells |= fill_dead_ends(self.pruned, self.keep, cells)
+        self.pruned_version = self.map_version
+        return self.pruned, self.dead_cells
+
 
 # ********************************************************************************************************
 
 
 class Search_waterfall(Waterfall):
-    def __init__(self, maze_dim, goal, start = (0, 0)):
+    anytime = True
+
+    def __init__(self, maze_dim, goal, start = (0, 0), step_budget=None):
         super(Search_waterfall, self).__init__(maze_dim, goal, start)
         # Set state (Exploration / Speed)
         self.name = "Search_waterfall"
+        # Optional planning time per step in seconds; when set, algorithm_choice plans in anytime mode
+        self.step_budget = step_budget
         self.maze = self.blank_maze(maze_dim, map_layers=2, goal=goal)
         self.target = list(goal)
+        self.route_cache = None
+        self.task = None
+        self.task_target = None
+        self.task_location = None
+        self.stats['route_reuses'] = 0
+        self.stats['deferred_steps'] = 0
+        self.stats['budget_overruns'] = 0
         
     
     def algorithm_choice(self, walls = list(), heading=0, location = (0, 0)):
@@ -296,126 +521,541 @@ class Search_waterfall(Waterfall):
         if self.plan:
             return self.plan.popleft()
         self.maze = self.update_maze(self.maze, walls, location)
-        self.maze[location[0], location[1],1] += 1
-        waterfall = self.waterfall_update(self.maze, self.target)
-        routes = self.route_planner(waterfall)            
-        if routes: 
-            potential_plan = min(routes, key=len)
-            empty_cells = self.verify_plan(potential_plan)
+        self.count_visit(self.maze, location)
+        if self.step_budget is None:
+            waterfall = self.waterfall_refresh(self.target, location)
+            potential_plan, empty_cells = self.route_candidate(waterfall)
+        else:
+            waterfall, potential_plan, empty_cells = self.anytime_plan(tuple(self.target), location)
+        if potential_plan:
             if empty_cells:
                 self.target = deque(empty_cells)
             elif (len(potential_plan) > 1):
-                self.plan = potential_plan
+                self.plan = self.speed_plan(potential_plan)
                 self.target = self.goal
                 return 'Reset', 'Reset'
         return self.waterfall_choice(waterfall, heading, location)
 
-                      
-    def verify_plan(self, plan):
-        """ Check the plan. Return list of spaces in plan that have not been explored """
-        current = deque(plan)
+
+    def speed_plan(self, plan):
+        """ Choose the plan for the speed run once exploration has verified the given route. """
+        return plan
+
+
+    def route_candidate(self, waterfall):
+        """ Return the route from start to the current target and the cells on it not yet explored. The route and
+            its verification are cached with the map version and reused while the target stays the same and no
+            cell the route crosses has gained a wall since; walls found elsewhere only remove other routes, so the
+            cached route stays one of the fewest-step descending routes. On reuse, cells visited in the meantime
+            are dropped from the unexplored list, as visits are never undone. The route is searched on the wall
+            layer the waterfall was filled on. """
+        target = tuple(self.target)
+        if self.route_stale(target):
+            self.store_route(target, self.route_planner(waterfall, walls=self.waterfall_walls()))
+        else:
+            self.stats['route_reuses'] += 1
+        return self.cached_route()
+
+
+    def waterfall_walls(self):
+        """ The wall layer the persistent waterfall was last filled on, pruned or full. """
+        return self.pruned if self.waterfall_pruned else self.maze[:, :, 0]
+
+
+    def route_stale(self, target):
+        """ True when there is no cached route to target, or a cell on it gained a wall since it was checked. """
+        cache = self.route_cache
+        return (cache is None) or (cache['target'] != target) or \
+            (self.cell_versions[cache['cells']].max() > cache['version'])
+
+
+    def store_route(self, target, plan, version=None):
+        """ Cache a route to target, found on the map as it was at version (by default, the current map). """
+        cells = [self.start] + self.plan_cells(plan)
+        self.route_cache = {'target': target, 'plan': plan, 'cells': tuple(np.array(cells).T),
+                            'empty': self.verify_plan(plan),
+                            'version': self.map_version if version is None else version}
+
+
+    def cached_route(self):
+        """ Return the cached route and its cells not yet explored, marking it as checked against the current map. """
+        cache = self.route_cache
+        cache['empty'] = [cell for cell in cache['empty'] if self.maze[cell[0], cell[1], 1] == 0]
+        cache['version'] = self.map_version
+        return deque(cache['plan']), list(cache['empty'])
+
+
+    def anytime_plan(self, target, location):
+        """ Plan within step_budget seconds. The waterfall and route work of route_candidate runs as a paused
+            task (planning_task) that is advanced until it finishes or the budget runs out. An unfinished task
+            carries over to the next step, even when the target has changed since it started, so every task
+            finishes; the map of a task finished for an earlier target is kept, but its route is not used and a
+            task for the current target takes over. Meanwhile the robot follows the last complete waterfall map,
+            repaired for the walls found on every step, which it descends towards that map's goal. When a step
+            starts with no move left on that map, at its goal or cut off from it, planning for the current target
+            is finished regardless of the budget, as it would be without one, so every lap ends with a complete
+            plan and the robot never waits for planning. Returns (waterfall, plan, unexplored
+            cells) like route_candidate. Steps left unfinished are counted in stats['deferred_steps'], and steps
+            whose planning took longer than the budget in stats['budget_overruns']. """
+        start = timer()
+        deadline = start + self.step_budget
+        self.task_location = location
+        if self.waterfall is not None:
+            self.waterfall_refresh(self.waterfall_goal, location)
+        stuck = (self.waterfall is None) or (self.waterfall[location[0], location[1]] <= 1)
+        while True:
+            if self.task is None:
+                self.task = self.planning_task(target)
+                self.task_target = target
+            result = next(self.task)
+            if result is not None:
+                self.task = None
+                if self.task_target == target:
+                    break
+                result = None # Planned for an earlier target: keep its map, plan again for this one
+            if (timer() >= deadline) and not stuck:
+                break
+        if timer() - start > self.step_budget:
+            self.stats['budget_overruns'] += 1
+        if result is None:
+            self.stats['deferred_steps'] += 1
+            return self.waterfall, deque(), list()
+        return result
+
+
+    def planning_task(self, target):
+        """ Generator form of waterfall_refresh and route_candidate for anytime_plan: yields None wherever the
+            work can be paused, then (waterfall, plan, unexplored cells). A waterfall rebuild pauses between
+            sweep rounds and the route search between waterfall levels. Cells walled during a rebuild, found
+            through their cell_versions, are repaired into the finished map; a route that crosses a cell walled
+            during its search is searched again on the current map. The wall layer is chosen for the robot's
+            location when the task resumes, task_location. """
+        while True:
+            walls, pruned = self.waterfall_layer(target, self.task_location)
+            if (self.waterfall is None) or (target != self.waterfall_goal) or (self.waterfall_pruned > pruned):
+                self.stats['waterfall_updates'] += 1
+                dead, version = self.dead_cells.copy(), self.map_version
+                for waterfall in flood_fill_rounds(walls, target, self.map_dtype):
+                    if waterfall is None:
+                        yield None
+                self.waterfall, self.waterfall_goal, self.waterfall_pruned = waterfall, target, pruned
+                self.waterfall_dead = dead
+                self.changed_cells = set((int(x), int(y)) for x, y in np.argwhere(self.cell_versions > version))
+            waterfall = self.waterfall_refresh(target, self.task_location)
+            if not self.route_stale(target):
+                break
+            version = self.map_version
+            for plan in self.route_search(waterfall, walls=self.waterfall_walls()):
+                if plan is None:
+                    yield None
+            self.store_route(target, plan, version)
+        yield (waterfall,) + self.cached_route()
+
+
+    def plan_cells(self, plan):
+        """ List the cells within the maze that the plan passes through from the start, in order. """
         location = self.start
         heading = 0
-        empty_cells = list()
-        while current:
-            step = current.popleft()
+        cells = list()
+        for step in plan:
             heading = self.decode_rotation(heading, step[0])
-            transform = self.decode_heading(heading)
+            transform = heading_offsets[heading]
             for cell in range(step[1]):
                 location = location[0]+transform[0], location[1]+transform[1]
                 if (max(location) < self.maze.shape[0]) and (min(location) >= 0):
-                    if self.maze[location[0], location[1], 1] == 0:
-                        empty_cells.append(location)
-        return empty_cells
-    
-    
-    def route_planner(self, waterfall):
-        """ Convert mapped routes into movement optimized routes. """
-        process_stack = self.route_mapper(waterfall, (0,0), 0)
-        plan_stack = deque()
-        while process_stack:
-            plan = process_stack.popleft()
-            rotate = 0
-            move = 0
-            new_plan = deque()
-            while plan:
-                step = plan.popleft()
-                next_step = (rotate, move)
-                if (step[0] == 0) and move < 3:
-                    move += 1
-                else:
-                    new_plan.append(next_step)
-                    rotate = step[0]
-                    move = step[1]
-            if len(new_plan) > 1:
-                new_plan.append(next_step)
-            plan_stack.append(new_plan)       
-        return plan_stack
+                    cells.append(location)
+        return cells
+
+                      
+    def verify_plan(self, plan):
+        """ Check the plan. Return list of spaces in plan that have not been explored """
+        return [cell for cell in self.plan_cells(plan) if self.maze[cell[0], cell[1], 1] == 0]
     
     
-    def route_mapper(self, waterfall, location, heading):
-        """ Recursively generate all descending routes from start to goal. """
-        neighbors = self.waterfall_neighbors(waterfall, location, True)
-        plan_stack = deque()
-        if waterfall[location[0], location[1]] == 1:
-            base = deque([(0,0)])
-            plan_stack.append(base)
-        else:
-            for n in neighbors:
-                rotate = self.heading_to_rotation(heading, n)
-                step = (rotate, 1)
-                if rotate != "None":
-                    transform = self.decode_heading(n)
-                    x = location[0] + transform[0]
-                    y = location[1] + transform[1]
-                    plan = self.route_mapper(waterfall, (x, y), n)
-                    while plan:
-                        route = plan.pop()
-                        route.appendleft(step)
-                        plan_stack.append(route)
-        return plan_stack
+    def route_planner(self, waterfall, location=None, heading=0, walls=None):
+        """ Find the descending route from start to goal that takes the fewest plan steps. A plan step is a
+            (rotation, movement) pair that turns at most once and then moves up to 3 cells straight ahead.
+            Routes are followed one waterfall level at a time over states of (cell, heading, cells moved in the
+            current step): going straight within a step is free, starting a new step costs one. Only the
+            cheapest way into each state is kept, so the work grows with the number of cells, not routes.
+            walls is the wall layer the waterfall was filled on, by default the full one of the map.
+            Returns the plan as a deque, empty if the location is already in the goal or cannot reach it. """
+        for plan in self.route_search(waterfall, location, heading, walls):
+            pass
+        return plan
+
+
+    def route_search(self, waterfall, location=None, heading=0, walls=None):
+        """ route_planner as a generator that can be paused: yields None after each waterfall level, then the
+            plan. The walls are read as the search goes, so a route found across pauses must be checked for
+            walls found in the meantime. """
+        self.stats['route_plans'] += 1
+        if location is None:
+            location = self.start
+        if walls is None:
+            walls = self.maze[:, :, 0]
+        location = tuple(location)
+        if waterfall[location[0], location[1]] <= 1:
+            yield deque()
+            return
+
+        # Each state maps to (steps taken, previous state, rotation, whether the move opened a new step).
+        # Starting with a full step in hand forces the first move to open a step of its own.
+        layer = [(location, heading, 3)]
+        best = {layer[0]: (0, None, 0, False)}
+        level = waterfall[location[0], location[1]]
+        while layer and level > 1:
+            level -= 1
+            next_layer = list()
+            for state in layer:
+                (x, y), h, moved = state
+                steps = best[state][0]
+                for new_heading in open_headings[walls[x, y]]:
+                    rotate = heading_rotations[h][new_heading]
+                    transform = heading_offsets[new_heading]
+                    cell = (x + transform[0], y + transform[1])
+                    if rotate == "None" or waterfall[cell[0], cell[1]] != level:
+                        continue
+                    if rotate == 0 and moved < 3:
+                        new_state, new_step = (cell, new_heading, moved + 1), False
+                    else:
+                        new_state, new_step = (cell, new_heading, 1), True
+                    if new_state not in best:
+                        next_layer.append(new_state)
+                    elif best[new_state][0] <= steps + new_step:
+                        continue
+                    best[new_state] = (steps + new_step, state, rotate, new_step)
+            layer = next_layer
+            yield None
+        if not layer:
+            yield deque()
+            return
+
+        # Walk back from the cheapest state on the goal level, then group the moves into plan steps
+        state = min(layer, key=lambda s: best[s][0])
+        moves = list()
+        while best[state][1] is not None:
+            moves.append(best[state][2:])
+            state = best[state][1]
+        plan = list()
+        for rotate, new_step in reversed(moves):
+            if new_step:
+                plan.append([rotate, 1])
+            else:
+                plan[-1][1] += 1
+        yield deque((rotate, move) for rotate, move in plan)
     
 
 # ********************************************************************************************************
 
 
 class Oracle_waterfall(Search_waterfall): # Perfect score by knowing the maze
-    def __init__(self, maze_dim, goal, start = (0, 0)):
+    anytime = False
+
+    def __init__(self, maze_dim, goal, start = (0, 0), plan_cache=None):
         super(Oracle_waterfall, self).__init__(maze_dim, goal, start)
         self.name = "Oracle Waterfall"
+        # Optional plancache.Plan_cache, which may be shared by many oracles; plans depend only on the maze, goal
+        # and start
+        self.plan_cache = plan_cache
 
-        
-    def maze_oracle(self, maze):
-        """ Accept maze object and fill in the internal maze to match. """
-        d = ['u', 'r', 'd', 'l']
-        maze_dim = maze.get_dim()
-        maze_walls = np.zeros((maze_dim, maze_dim, 1), dtype=np.uint8)
-        for x in range(maze_dim):
-            for y in range(maze_dim):
-                for w in range(4):
-                    if not maze.is_permissible([x, y], d[w]):
-                        maze_walls[x, y] += 2**w
-        self.maze[:,:,:] = maze_walls[:,:,:]
-        return True
-        
     
     def algorithm_choice(self, walls = list(), heading=0, location = (0, 0)):
         """ Determine the next action to take in searching for the goal. """
         if not self.plan:
-            waterfall = self.waterfall_update(self.maze)
-            self.plan = min(self.route_planner(waterfall), key=len)
+            self.plan = self.oracle_plan()
         if (location in self.goal): # If goal has been reached and back at start, end run.
             return 'Reset', 'Reset'
 
         return self.plan.popleft()
+
+
+    def oracle_plan(self):
+        """ Plan the route from start over the full map, looking it up in the plan cache when one is set. The
+            waterfall is filled on the pruned map, so dead-end branches are left out of the planning. """
+        pruned = self.prune_map()[0]
+        if self.plan_cache is None:
+            waterfall = self.waterfall_update(pruned[:, :, None])
+            return self.route_planner(waterfall, walls=pruned)
+        key = self.plan_cache.key(self.maze[:, :, 0], self.goal, self.start)
+        entry = self.plan_cache.get(key)
+        if entry is None:
+            waterfall = self.waterfall_update(pruned[:, :, None])
+            entry = self.plan_cache.put(key, waterfall, self.route_planner(waterfall, walls=pruned))
+        return deque(entry[1])
+    
+
+# ********************************************************************************************************
+
+
+class Speed_waterfall(Search_waterfall): # Explore like Search_waterfall, then take the fewest-step speed run
+    def __init__(self, maze_dim, goal, start = (0, 0), step_budget=None):
+        super(Speed_waterfall, self).__init__(maze_dim, goal, start, step_budget)
+        self.name = "Speed Waterfall"
+
+
+    def speed_plan(self, plan):
+        """ Replace the explored route with the fastest run through visited cells, whose walls are all known,
+            leaving out dead-end branches. """
+        allowed = (self.maze[:, :, 1] > 0) & ~self.prune_map()[1]
+        return self.speed_route(self.goal, self.start, 0, allowed) or plan
+
+
+    def speed_route(self, goal, location=(0, 0), heading=0, allowed=None, walls=None):
+        """ Dijkstra search over (location, heading) states for the run needing the fewest time steps.
+            As in tester.py, one time step is a rotation of -90, 0 or 90 followed by a movement of -3 to 3
+            cells, so every action costs one step. Among equally fast runs, the one with the fewest reversing
+            moves wins. allowed optionally masks the cells a move may pass through, and walls replaces the wall
+            layer of the map. Returns the plan as a deque of (rotation, movement) pairs, empty if already in the
+            goal or the goal cannot be reached. """
+        self.stats['route_plans'] += 1
+        if walls is None:
+            walls = self.maze[:, :, 0]
+        goal = set(goal)
+        start = (tuple(location), heading)
+        cost = {start: (0, 0)}
+        parent = {start: None}
+        queue = [(0, 0, start)]
+        while queue:
+            steps, reverses, state = heapq.heappop(queue)
+            if (steps, reverses) != cost[state]:
+                continue
+            loc, h = state
+            if loc in goal:
+                plan = deque()
+                while parent[state] is not None:
+                    state, rotate, movement = parent[state]
+                    plan.appendleft((rotate, movement))
+                return plan
+            for rotate in (-90, 0, 90):
+                new_heading = self.decode_rotation(h, rotate)
+                actions = list()
+                if rotate != 0:
+                    actions.append((loc, 0))
+                for direction, sign in ((new_heading, 1), ((new_heading + 2) % 4, -1)):
+                    transform = heading_offsets[direction]
+                    x, y = loc
+                    for move in range(1, 4):
+                        if not passable[walls[x, y]] & wall_bits[direction]:
+                            break
+                        x += transform[0]
+                        y += transform[1]
+                        if (allowed is not None) and not allowed[x, y]:
+                            break
+                        actions.append(((x, y), sign * move))
+                for new_loc, movement in actions:
+                    new_state = (new_loc, new_heading)
+                    new_cost = (steps + 1, reverses + (movement < 0))
+                    if (new_state not in cost) or (new_cost < cost[new_state]):
+                        cost[new_state] = new_cost
+                        parent[new_state] = (state, rotate, movement)
+                        heapq.heappush(queue, new_cost + (new_state,))
+        return deque()
     
 
 # ********************************************************************************************************
 
 
+class Adaptive_waterfall(Speed_waterfall): # Waterfall laps until the shortest route is proven, then a speed run
+    # The proof counts cells, while runs are scored in time steps: the speed run is the fastest one through sides
+    # known to be open, which may take more steps than a run through sides never observed (test_maze_02: 25 steps
+    # against 22). Proving the time-step bound instead keeps the laps going long after the route is found, often
+    # past the time limit, as the laps never look at the straights a faster run could take.
+    anytime = False
+
+    def __init__(self, maze_dim, goal, start = (0, 0)):
+        super(Adaptive_waterfall, self).__init__(maze_dim, goal, start)
+        self.name = "Adaptive Waterfall"
+        self.target = list(goal)
+        self.goal_reached = False
+        self.bounds = None
+        self.bounds_version = None
+
+
+    def algorithm_choice(self, walls = list(), heading=0, location = (0, 0)):
+        """ Run laps between start and goal on the optimistic waterfall, where unknown walls count as open, like
+            Waterfall, but without a fixed lap count: once the goal has been reached and the optimistic shortest
+            route is no longer than the shortest route through sides known to be open, that route is proven
+            optimal, so exploration ends and the speed run follows the fastest known-open run. Only the route
+            length in cells is proven, not the time steps of the speed run (see the class comment). """
+        if self.plan:
+            return self.plan.popleft()
+        self.maze = self.update_maze(self.maze, walls, location)
+        self.observe_sensors(walls, location)
+        self.count_visit(self.maze, location)
+        if location in self.goal:
+            self.goal_reached = True
+        if self.goal_reached and self.route_proven():
+            self.exploring = False
+            self.plan = self.speed_route(self.goal, self.start, 0, walls=self.bound_maps()[1])
+            return 'Reset', 'Reset'
+        return self.explore_choice(heading, location)
+
+
+    def explore_choice(self, heading, location):
+        """ Next exploration move: alternate laps between the goal and the start along the optimistic waterfall. """
+        if location in self.target:
+            self.target = [self.start] if self.target == list(self.goal) else list(self.goal)
+        waterfall = self.waterfall_refresh(self.target, location)
+        return self.waterfall_choice(waterfall, heading, location)
+
+
+    def route_proven(self):
+        """ True once the optimistic and pessimistic shortest routes from start to goal have the same length.
+            The bounds are only recomputed when the map or the known sides have changed. """
+        version = (self.map_version, self.known_version)
+        if version != self.bounds_version:
+            self.bounds = self.route_bounds()
+            self.bounds_version = version
+        optimistic, pessimistic = self.bounds
+        return pessimistic > 0 and pessimistic == optimistic
+
+
+# ********************************************************************************************************
+
+
+class Frontier_explorer(Adaptive_waterfall): # Explore only where the optimistic shortest route is still unproven
+    def __init__(self, maze_dim, goal, start = (0, 0)):
+        super(Frontier_explorer, self).__init__(maze_dim, goal, start)
+        self.name = "Frontier Explorer"
+        self.frontier = list()
+        self.frontier_version = None
+        self.stats['frontier_fills'] = 0
+
+
+    def explore_choice(self, heading, location):
+        """ Make for the goal along the optimistic waterfall first, which the run has to reach anyway. After that,
+            head for the nearest frontier cell, a cell with unknown sides, that lies on an optimistic shortest route
+            from start to goal: only there can new walls lengthen the optimistic route or confirm it. Cells seen
+            by the sensors count as explored, so far less driving is needed than when every cell must be visited.
+            With no such cell left the route is proven and exploration ends. """
+        targets = list()
+        if self.goal_reached:
+            targets = [cell for cell in self.useful_frontier() if cell != location]
+        if not targets:
+            targets = list(self.goal)
+        waterfall = self.waterfall_refresh(targets, location)
+        return self.explore_run(waterfall, heading, location)
+
+
+    def useful_frontier(self):
+        """ Frontier cells on any optimistic shortest route from start to goal, recomputed when the map changes
+            with two flood fills, counted in stats['frontier_fills']. """
+        version = (self.map_version, self.known_version)
+        if version != self.frontier_version:
+            optimistic = self.maze[:, :, 0]
+            to_goal = flood_fill(optimistic, self.goal).astype(np.int64)
+            from_start = flood_fill(optimistic, [self.start]).astype(np.int64)
+            self.stats['frontier_fills'] += 2
+            length = to_goal[self.start[0], self.start[1]]
+            on_route = (to_goal > 0) & (from_start > 0) & (to_goal + from_start - 1 == length)
+            self.frontier = [(int(x), int(y)) for x, y in np.argwhere(on_route & (self.known != 15))]
+            self.frontier_version = version
+        return self.frontier
+
+
+    def explore_run(self, waterfall, heading, location):
+        """ Take the waterfall step, then keep going straight, up to 3 cells, through cells whose sides are all
+            known while the waterfall keeps descending ahead. Moves never run into unknown sides, and the robot
+            stops at each cell it still has to look at. """
+        rotation, movement = self.waterfall_choice(waterfall, heading, location)
+        if movement == 0:
+            return rotation, movement
+        h = self.decode_rotation(heading, rotation)
+        transform = heading_offsets[h]
+        x = location[0] + transform[0]
+        y = location[1] + transform[1]
+        while movement < 3 and self.known[x, y] == 15 and waterfall[x, y] > 1 and \
+                h in self.waterfall_neighbors(waterfall, (x, y)):
+            x += transform[0]
+            y += transform[1]
+            movement += 1
+        return rotation, movement
+
+
+# ********************************************************************************************************
+
+
 if __name__ == '__main__':
+    from mazegen import generate_mazes
+
+    goal = [(8, 8), (8, 7), (7, 8), (7, 7)]
+    bot = Waterfall(16, goal)
     assert bot.decode_cell(6) == [2, 4]
     assert bot.decode_cell(11) == [1, 2, 8]
     assert bot.decode_cell(15) == [1, 2, 4, 8]
     
     maze = bot.waterfall_update(bot.maze)
+
+    # Repairing the waterfall as walls are found gives the same map as filling it again
+    random = np.random.RandomState(0)
+    for truth in map_walls(generate_mazes(4, 16, loops=0.2, seed=1)):
+        for target in (goal, [(0, 0)]):
+            bot = Waterfall(16, goal)
+            waterfall = bot.waterfall_update(bot.maze, target)
+            for cells in np.array_split(random.permutation(16 * 16), 6):
+                for cell in cells:
+                    x, y = divmod(int(cell), 16)
+                    bot.update_maze(bot.maze, [0 if truth[x, y] & wall_bits[w] else 1 for w in range(4)], (x, y))
+                waterfall = bot.waterfall_repair(waterfall, bot.maze, target, bot.changed_cells)
+                bot.changed_cells = set()
+                assert (waterfall == bot.waterfall_update(bot.maze, target)).all()
+            bot.update_maze(bot.maze, [0, 0, 0, 0], (3, 12)) # Walled in, so cut off from the target
+            waterfall = bot.waterfall_repair(waterfall, bot.maze, target, bot.changed_cells)
+            assert waterfall[3, 12] == 0
+            assert (waterfall == bot.waterfall_update(bot.maze, target)).all()
+
+    # Away from dead-end branches, the waterfall refreshed on the pruned layer matches a full fill, and routes
+    # searched over it are as short; a robot inside a dead-end branch gets the full map
+    for truth in map_walls(generate_mazes(4, 16, seed=2)):
+        bot = Search_waterfall(16, goal)
+        for cells in np.array_split(random.permutation(16 * 16), 6):
+            for cell in cells:
+                x, y = divmod(int(cell), 16)
+                bot.update_maze(bot.maze, [0 if truth[x, y] & wall_bits[w] else 1 for w in range(4)], (x, y))
+            waterfall = bot.waterfall_refresh(goal, bot.start)
+            full = bot.waterfall_update(bot.maze, goal)
+            assert bot.waterfall_pruned
+            assert (waterfall[~bot.dead_cells] == full[~bot.dead_cells]).all()
+            assert not waterfall[bot.dead_cells].any()
+            assert len(bot.route_planner(waterfall, walls=bot.waterfall_walls())) == len(bot.route_planner(full))
+        x, y = np.argwhere(bot.dead_cells)[0]
+        assert (bot.waterfall_refresh(goal, (x, y)) == full).all() and not bot.waterfall_pruned
+
+    # The route planner finds a descending route with the fewest plan steps of all of them
+    def fewest_steps(bot, waterfall, cell, heading, moved):
+        """ Exhaustive reference: plan steps of the best descending route from cell, trying every route. """
+        level = waterfall[cell[0], cell[1]]
+        if level == 1:
+            return 0
+        best = None
+        for new_heading in open_headings[bot.maze[cell[0], cell[1], 0]]:
+            rotate = heading_rotations[heading][new_heading]
+            transform = heading_offsets[new_heading]
+            new_cell = (cell[0] + transform[0], cell[1] + transform[1])
+            if rotate == "None" or waterfall[new_cell[0], new_cell[1]] != level - 1:
+                continue
+            if rotate == 0 and moved < 3:
+                steps = fewest_steps(bot, waterfall, new_cell, new_heading, moved + 1)
+            else:
+                steps = fewest_steps(bot, waterfall, new_cell, new_heading, 1)
+                steps = None if steps is None else steps + 1
+            if steps is not None and (best is None or steps < best):
+                best = steps
+        return best
+
+    for dim, loops in ((8, 0.5), (12, 0.3), (16, 0.1)):
+        center = dim // 2
+        target = [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
+        for truth in map_walls(generate_mazes(4, dim, loops=loops, seed=dim)):
+            bot = Search_waterfall(dim, target)
+            bot.maze[:, :, 0] = truth
+            waterfall = bot.waterfall_update(bot.maze, target)
+            plan = bot.route_planner(waterfall)
+            assert len(plan) == fewest_steps(bot, waterfall, bot.start, 0, 3)
+            cells = [bot.start] + bot.plan_cells(plan)
+            assert all(0 < move <= 3 for rotate, move in plan)
+            assert [waterfall[x, y] for x, y in cells] == list(range(waterfall[0, 0], 0, -1))
+            for (x, y), new_cell in zip(cells, cells[1:]):
+                heading = heading_offsets.index((new_cell[0] - x, new_cell[1] - y))
+                assert not bot.maze[x, y, 0] & wall_bits[heading]
@@ -0,0 +1,192 @@
+from maze import Maze
+from tester import run_trial, algorithms
+from algorithms import Oracle_waterfall
+from plancache import Plan_cache
+from functools import partial
+from multiprocessing import Pool
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+# mazes already loaded by this process, keyed by file name
+maze_cache = dict()
+# plan caches opened by this process, keyed by directory
+plan_caches = dict()
+
+
+def make_jobs(maze_files, algorithm_classes=None, seeds=(None,)):
+    """ Build the (maze file, algorithm class, seed) grid to evaluate. An algorithm class of None stands for
+        the default random walker of Robot, the only robot whose results depend on the seed. """
+
+    if algorithm_classes is None:
+        algorithm_classes = [algorithms[i] for i in sorted(algorithms)]
+    return [(filename, algorithm_class, seed)
+            for filename in maze_files
+            for algorithm_class in algorithm_classes
+            for seed in seeds]
+
+
+def run_job(job, verbose=False, record_path=False, plan_cache=None, step_budget=None):
+    """ Score a single (maze file, algorithm class, seed) job.
+
+        Each job seeds its own robot, so results do not depend on which worker
+        runs the job or on what that worker ran before. With record_path the
+        result holds the robot's path in each run (see tester.run_trial).
+        plan_cache names a directory of oracle plans. Every process opens its
+        own Plan_cache on it, so plans found by one worker reach the others,
+        and later batches, through the disk only. step_budget, the planning
+        time per step in seconds, is given to the algorithms with an anytime
+        mode (Algorithm.anytime) and left out for the others. """
+
+    filename, algorithm_class, seed = job
+    if filename not in maze_cache:
+        maze_cache[filename] = Maze(filename)
+    options = dict()
+    if (plan_cache is not None) and (algorithm_class is Oracle_waterfall):
+        if plan_cache not in plan_caches:
+            plan_caches[plan_cache] = Plan_cache(plan_cache)
+        options['plan_cache'] = plan_caches[plan_cache]
+    if (step_budget is not None) and (algorithm_class is not None) and algorithm_class.anytime:
+        options['step_budget'] = step_budget
+    result = run_trial(maze_cache[filename], algorithm_class, verbose=verbose, seed=seed, record_path=record_path,
+                       algorithm_options=options)
+    result['maze'] = filename
+    result['seed'] = seed
+    return result
+
+
+def batch_test(maze_files, algorithm_classes=None, seeds=(None,), verbose=False, record_path=False, plan_cache=None,
+               step_budget=None):
+    """ Score every algorithm on every maze file without opening a display.
+
+        Nothing imported here pulls in turtle, so the batch can run unattended.
+        Returns a list of result dictionaries (see tester.run_trial), each tagged
+        with the maze file and seed it was produced with. """
+
+    return [run_job(job, verbose, record_path, plan_cache, step_budget)
+            for job in make_jobs(maze_files, algorithm_classes, seeds)]
+
+
+def parallel_batch_test(maze_files, algorithm_classes=None, seeds=(None,), max_workers=None, record_path=False,
+                        plan_cache=None, step_budget=None):
+    """ Spread the job grid of batch_test across a process pool.
+
+        Results are merged back in job order, so the table matches what
+        batch_test would return for the same arguments. """
+
+    jobs = make_jobs(maze_files, algorithm_classes, seeds)
+    pool = Pool(processes=max_workers)
+    try:
+        return pool.map(partial(run_job, record_path=record_path, plan_cache=plan_cache, step_budget=step_budget),
+                        jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_results(results):
+    """ Render batch results as a plain text table. """
+
+    columns = ['maze', 'algorithm', 'seed', 'run_1', 'run_2', 'score', 'timeout', 'wall_bumps']
+    rows = [columns]
+    for result in results:
+        row = list()
+        for column in columns:
+            value = result.get(column)
+            if isinstance(value, float):
+                value = "{:4.3f}".format(value)
+            row.append(str(value))
+        rows.append(row)
+    widths = [max(len(row[c]) for row in rows) for c in range(len(columns))]
+    return "\n".join("  ".join(row[c].ljust(widths[c]) for c in range(len(columns))) for row in rows)
+
+
+def unit_tests(maze_file):
+    """ Test that seeds reach the robots: the default walker repeats its results for the same seed and
+        varies them across seeds, while the deterministic algorithms ignore the seed. Also test that the oracle
+        gets the plan cache passed to run_job and stores its plan on disk for other processes, and that the
+        anytime algorithms still complete both runs when no step leaves any time for planning. """
+
+    def outcome(result):
+        return tuple(result[key] for key in ('run_1', 'run_2', 'steps', 'wall_bumps'))
+
+    walks = [outcome(run_job((maze_file, None, seed))) for seed in range(5)]
+    assert walks[0] == outcome(run_job((maze_file, None, 0)))
+    assert len(set(walks)) > 1
+    waterfalls = [outcome(run_job((maze_file, algorithms[3], seed))) for seed in range(2)]
+    assert waterfalls[0] == waterfalls[1]
+
+    # The default walker joins the grid as algorithm class None
+    assert (maze_file, None, 1) in make_jobs([maze_file], [algorithms[0], None], range(2))
+
+    directory = tempfile.mkdtemp()
+    try:
+        oracle = outcome(run_job((maze_file, Oracle_waterfall, None)))
+        assert oracle == outcome(run_job((maze_file, Oracle_waterfall, None), plan_cache=directory))
+        assert len(os.listdir(directory)) == 1
+        assert plan_caches[directory].stats['misses'] == 1
+        del plan_caches[directory] # A fresh process finds the plan on disk
+        assert oracle == outcome(run_job((maze_file, Oracle_waterfall, None), plan_cache=directory))
+        assert plan_caches[directory].stats == {'memory_hits': 1, 'disk_hits': 1, 'misses': 0} # One lookup per run
+    finally:
+        plan_caches.pop(directory, None)
+        shutil.rmtree(directory)
+
+    for algorithm_class in (algorithms[i] for i in sorted(algorithms)):
+        if algorithm_class.anytime:
+            for step_budget in (1e-6, 0.0):
+                result = run_job((maze_file, algorithm_class, None), step_budget=step_budget)
+                assert not result['timeout'] and result['run_2'] and not result['wall_bumps']
+    return True
+
+
+if __name__ == '__main__':
+    """ Score all algorithms on each maze file given on the command line. """
+    parser = argparse.ArgumentParser(description="Headless evaluation of the maze solving algorithms.")
+    parser.add_argument('mazes', nargs='+', help="maze files to evaluate")
+    parser.add_argument('--seeds', type=int, default=0,
+                        help="number of robot seeds per maze and algorithm (default: module level random state); "
+                             "only the default walker depends on the seed, so it joins the grid when seeds are given")
+    parser.add_argument('--algorithms', nargs='+', choices=['default'] + [algorithms[i].__name__ for i in algorithms],
+                        help="algorithm classes to evaluate, default for the Robot random walker (default: all)")
+    parser.add_argument('--unit-tests', action='store_true', help="run the seed tests on the maze files and exit")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes, 0 for one per core")
+    parser.add_argument('--plan-cache', metavar='DIR',
+                        help="directory caching oracle plans between runs")
+    parser.add_argument('--step-budget', type=float, metavar='MS',
+                        help="planning time per step in milliseconds for the algorithms with an anytime mode")
+    args = parser.parse_args()
+
+    if args.unit_tests:
+        for filename in args.mazes:
+            unit_tests(filename)
+        print("unit tests passed")
+        sys.exit(0)
+
+    registry = dict((algorithms[i].__name__, algorithms[i]) for i in algorithms)
+    registry['default'] = None
+    if args.algorithms:
+        algorithm_classes = [registry[name] for name in args.algorithms]
+    else:
+        algorithm_classes = [algorithms[i] for i in sorted(algorithms)] + ([None] if args.seeds else [])
+    step_budget = None
+    if args.step_budget is not None:
+        step_budget = args.step_budget / 1000.
+        ignored = [name for name in sorted(registry)
+                   if registry[name] in algorithm_classes and not (registry[name] and registry[name].anytime)]
+        if args.algorithms and ignored:
+            parser.error("--step-budget is not supported by: " + ", ".join(ignored))
+        elif ignored:
+            sys.stderr.write("--step-budget only applies to the anytime algorithms; running without a budget: " +
+                             ", ".join(ignored) + "\n")
+    seeds = range(args.seeds) if args.seeds else (None,)
+    if args.workers == 1:
+        results = batch_test(args.mazes, algorithm_classes, seeds=seeds, plan_cache=args.plan_cache,
+                             step_budget=step_budget)
+    else:
+        results = parallel_batch_test(args.mazes, algorithm_classes, seeds=seeds, max_workers=args.workers or None,
+                                      plan_cache=args.plan_cache, step_budget=step_budget)
+    print(format_results(results))
@@ -0,0 +1,227 @@
+"""
+Benchmarks for the planning and simulation hot paths, run on generated mazes of several sizes and
+types. Each benchmark reports per-call latency percentiles; full tester runs also report simulated
+time steps per second. Results are written as JSON, and a saved result file can serve as the
+baseline that later runs are compared against.
+"""
+from __future__ import print_function, division
+from maze import Maze
+from robot import Robot
+from tester import run_trial, algorithms
+import mazefile
+import mazegen
+import numpy as np
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+timer = timeit.default_timer
+
+# mazegen settings for each maze type
+maze_types = {'perfect': {}, 'loopy': {'loops': 0.1}, 'braid': {'dead_ends': 0.2}}
+
+# statistic compared for each kind of result, and whether larger values are better
+compare_keys = (('p50', False), ('p90', False), ('steps_per_second', True))
+
+
+class Timed_robot(Robot):
+    """ Robot that records the wall-clock time of every next_move call. """
+    def __init__(self, maze_dim, alg_choice="default", goal=None, seed=None):
+        super(Timed_robot, self).__init__(maze_dim, alg_choice, goal, seed)
+        self.samples = list()
+
+    def next_move(self, sensors):
+        start = timer()
+        result = super(Timed_robot, self).next_move(sensors)
+        self.samples.append(timer() - start)
+        return result
+
+
+def load_mazes(directory, dim, maze_type, count, seed):
+    """ Generate count mazes of one size and type, store them as a binary bundle and open them. """
+    filename = os.path.join(directory, '{}_{}.maze'.format(maze_type, dim))
+    mazefile.write_binary(filename, mazegen.generate_mazes(count, dim, seed=seed, **maze_types[maze_type]))
+    return [Maze(filename, i, validate=False) for i in range(count)]
+
+
+def center_goal(dim):
+    center = dim // 2
+    return [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
+
+
+def known_map(testmaze):
+    """ Returns an Oracle_waterfall holding the full map of the maze. """
+    algorithm = algorithms[0](testmaze.get_dim(), center_goal(testmaze.get_dim()))
+    algorithm.maze_oracle(testmaze)
+    return algorithm
+
+
+def time_calls(function, repeat, inner=1):
+    """ Time repeat samples of inner calls each; returns the mean time per call of every sample. """
+    samples = list()
+    for _ in range(repeat):
+        start = timer()
+        for _ in range(inner):
+            function()
+        samples.append((timer() - start) / inner)
+    return samples
+
+
+def latency(samples):
+    """ Summarize per-call times, in microseconds. """
+    samples = np.asarray(samples) * 1e6
+    return {'calls': int(samples.size),
+            'mean': float(samples.mean()),
+            'p50': float(np.percentile(samples, 50)),
+            'p90': float(np.percentile(samples, 90)),
+            'p99': float(np.percentile(samples, 99)),
+            'max': float(samples.max())}
+
+
+def bench_waterfall_update(testmaze, repeat):
+    algorithm = known_map(testmaze)
+    return time_calls(lambda: algorithm.waterfall_update(algorithm.maze), repeat)
+
+
+def bench_route_planner(testmaze, repeat):
+    algorithm = known_map(testmaze)
+    waterfall = algorithm.waterfall_update(algorithm.maze)
+    return time_calls(lambda: algorithm.route_planner(waterfall), repeat)
+
+
+def bench_dist_to_wall(testmaze, repeat):
+    rng = np.random.RandomState(0)
+    dim = testmaze.get_dim()
+    queries = [([int(x), int(y)], 'urdl'[d]) for x, y, d in
+               zip(rng.randint(0, dim, 100), rng.randint(0, dim, 100), rng.randint(0, 4, 100))]
+    def sense():
+        for cell, direction in queries:
+            testmaze.dist_to_wall(cell, direction)
+    return [sample / len(queries) for sample in time_calls(sense, repeat)]
+
+
+def bench_tester_run(testmaze, algorithm_class):
+    """ Full two-run trial; returns the next_move samples, the time steps simulated and the seconds taken. """
+    robots = list()
+    def robot_class(*args, **kwargs):
+        robots.append(Timed_robot(*args, **kwargs))
+        return robots[-1]
+    start = timer()
+    result = run_trial(testmaze, algorithm_class, verbose=False, seed=0, robot_class=robot_class)
+    return robots[0].samples, result['steps'], timer() - start
+
+
+def run_benchmarks(sizes, types, count, repeat, algorithm_classes, seed=0, log=None):
+    """ Run every benchmark on count mazes of each size and type. Returns a list of result dictionaries
+        keyed by benchmark, size and maze type (and algorithm for full runs). """
+    results = list()
+    directory = tempfile.mkdtemp()
+    try:
+        for dim in sizes:
+            for maze_type in types:
+                mazes = load_mazes(directory, dim, maze_type, count, seed)
+                key = {'size': dim, 'maze_type': maze_type}
+                for name, bench in (('waterfall_update', bench_waterfall_update),
+                                    ('route_planner', bench_route_planner),
+                                    ('dist_to_wall', bench_dist_to_wall)):
+                    samples = sum((bench(testmaze, repeat) for testmaze in mazes), [])
+                    results.append(dict(key, benchmark=name, **latency(samples)))
+                    if log: log(results[-1])
+                for algorithm_class in algorithm_classes:
+                    samples, steps, seconds = list(), 0, 0.0
+                    for testmaze in mazes:
+                        run_samples, run_steps, run_seconds = bench_tester_run(testmaze, algorithm_class)
+                        samples += run_samples
+                        steps += run_steps
+                        seconds += run_seconds
+                    name = algorithm_class.__name__
+                    results.append(dict(key, benchmark='next_move', algorithm=name, **latency(samples)))
+                    if log: log(results[-1])
+                    results.append(dict(key, benchmark='tester_run', algorithm=name, steps=steps,
+                                        seconds=seconds, steps_per_second=steps / seconds))
+                    if log: log(results[-1])
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def result_key(result):
+    return (result['benchmark'], result['size'], result['maze_type'], result.get('algorithm'))
+
+
+def compare(baseline, current, threshold):
+    """ Returns a list of (key, statistic, baseline value, current value) for every statistic that got
+        worse by more than the threshold fraction. """
+    previous = dict((result_key(result), result) for result in baseline)
+    regressions = list()
+    for result in current:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for statistic, larger_is_better in compare_keys:
+            if statistic not in result or statistic not in old:
+                continue
+            if larger_is_better:
+                worse = result[statistic] < old[statistic] * (1 - threshold)
+            else:
+                worse = result[statistic] > old[statistic] * (1 + threshold)
+            if worse:
+                regressions.append((result_key(result), statistic, old[statistic], result[statistic]))
+    return regressions
+
+
+def describe(result):
+    name = result['benchmark'] + (' ' + result['algorithm'] if 'algorithm' in result else '')
+    if 'steps_per_second' in result:
+        summary = '{:.0f} steps/s'.format(result['steps_per_second'])
+    else:
+        summary = 'p50 {:.1f} us  p90 {:.1f} us  p99 {:.1f} us'.format(result['p50'], result['p90'], result['p99'])
+    return '{:>4} {:<8} {:<32} {}'.format(result['size'], result['maze_type'], name, summary)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the planning and simulation hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 32, 64, 128], help="maze dimensions")
+    parser.add_argument('--types', nargs='+', default=sorted(maze_types), choices=sorted(maze_types),
+                        help="maze types")
+    parser.add_argument('--mazes', type=int, default=2, help="mazes per size and type")
+    parser.add_argument('--repeat', type=int, default=20, help="samples per maze for the call benchmarks")
+    parser.add_argument('--algorithms', nargs='*', default=['Search_waterfall'],
+                        help="algorithm classes for full tester runs")
+    parser.add_argument('--output', help="file to write the results to as JSON (default: only print them)")
+    parser.add_argument('--baseline', help="result file to compare against")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="only compare two existing result files")
+    parser.add_argument('--threshold', type=float, default=0.1, help="allowed slowdown fraction")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_in:
+            baseline = json.load(f_in)['results']
+        with open(args.compare[1]) as f_in:
+            current = json.load(f_in)['results']
+    else:
+        registry = dict((algorithms[i].__name__, algorithms[i]) for i in algorithms)
+        algorithm_classes = [registry[name] for name in args.algorithms]
+        current = run_benchmarks(args.sizes, args.types, args.mazes, args.repeat, algorithm_classes,
+                                 log=lambda result: print(describe(result)))
+        if args.output:
+            with open(args.output, 'w') as f_out:
+                json.dump({'settings': vars(args), 'results': current}, f_out, indent=1)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f_in:
+                baseline = json.load(f_in)['results']
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        for key, statistic, old, new in regressions:
+            print('REGRESSION {} {}: {:.1f} -> {:.1f}'.format(' '.join(str(k) for k in key if k is not None),
+                                                              statistic, old, new))
+        if regressions:
+            sys.exit(1)
+        print('No regressions beyond {:.0%}.'.format(args.threshold))
@@ -0,0 +1,139 @@
+"""
+Oracle baselines for a whole corpus of same-size mazes at once. Wall grids are stacked into one
+(count, dim, dim) array and every maze is solved in the same array passes: the waterfall distance
+maps come from the batched flood fill, and the optimal run lengths from a breadth-first search over
+(cell, heading) states in which each level is one time step of the tester rules: a rotation of -90,
+0 or 90 followed by a move of -3 to 3 cells that walls cut short.
+
+The run length is the fewest time steps from the start to the goal, the second run of a robot that
+knows the maze. Such a robot ends its first run one step later, with its reset, which gives the best
+possible score for each maze.
+"""
+from __future__ import print_function, division
+from floodfill import flood_fill
+from walltables import map_walls
+from tester import train_score_mult
+import mazefile
+import numpy as np
+import argparse
+
+# maze cells solved per batch, bounding memory use for large corpora
+batch_cells = 2**20
+
+
+def center_goal(dim):
+    """ The central 2 x 2 goal cells used by tester.py. """
+    center = dim // 2
+    return [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
+
+
+def distance_maps(walls, goal=None):
+    """ Waterfall distance maps (goal 1, unreachable 0) of a (count, dim, dim) stack of Maze.walls grids. """
+    walls = np.asarray(walls)
+    if goal is None:
+        goal = center_goal(walls.shape[-1])
+    return flood_fill(map_walls(walls), goal)
+
+
+def advance(cells, heading, open_sides):
+    """ Move a (count, dim, dim) mask of cells one cell in the direction of heading, through open sides
+        only. open_sides holds one mask per heading of the cells with that side open. """
+    moved = np.zeros_like(cells)
+    passing = cells & open_sides[heading]
+    if heading == 0:
+        moved[:, :, 1:] = passing[:, :, :-1]
+    elif heading == 1:
+        moved[:, 1:, :] = passing[:, :-1, :]
+    elif heading == 2:
+        moved[:, :, :-1] = passing[:, :, 1:]
+    else:
+        moved[:, :-1, :] = passing[:, 1:, :]
+    return moved
+
+
+def run_lengths(walls, goal=None, start=(0, 0), heading=0, limit=None):
+    """ Fewest time steps from start (facing heading) until the robot stops in a goal cell, for every
+        grid of a (count, dim, dim) stack of Maze.walls grids; -1 where the goal cannot be reached within
+        limit steps (by default, the number of cells). Mazes leave the search as soon as they are solved. """
+    walls = np.asarray(walls)
+    count, dim = walls.shape[0], walls.shape[-1]
+    if goal is None:
+        goal = center_goal(dim)
+    if limit is None:
+        limit = dim * dim
+    goal_x = np.array([cell[0] for cell in goal])
+    goal_y = np.array([cell[1] for cell in goal])
+
+    lengths = np.full(count, -1, dtype=np.int64)
+    pending = np.arange(count)
+    open_sides = [walls & bit != 0 for bit in (1, 2, 4, 8)]
+    frontier = np.zeros((count, dim, dim, 4), dtype=bool)
+    frontier[:, start[0], start[1], heading] = True
+    reached = frontier.copy()
+    for step in range(1, limit + 1):
+        # Rotate by -90, 0 or 90, then move up to 3 cells forward or back along the new heading
+        turned = frontier | np.roll(frontier, 1, axis=-1) | np.roll(frontier, -1, axis=-1)
+        new = np.zeros_like(frontier)
+        for h in range(4):
+            forward = backward = turned[..., h]
+            new[..., h] = forward
+            for _ in range(3):
+                forward = advance(forward, h, open_sides)
+                backward = advance(backward, (h + 2) % 4, open_sides)
+                new[..., h] |= forward | backward
+        new &= ~reached
+        reached |= new
+
+        solved = new[:, goal_x, goal_y, :].any(axis=(1, 2))
+        lengths[pending[solved]] = step
+        keep = ~solved & new.any(axis=(1, 2, 3))
+        if not keep.any():
+            break
+        if not keep.all():
+            pending, new, reached = pending[keep], new[keep], reached[keep]
+            open_sides = [sides[keep] for sides in open_sides]
+        frontier = new
+    return lengths
+
+
+def oracle_baselines(walls, goal=None):
+    """ Optimal results of every maze in a (count, dim, dim) stack of Maze.walls grids, solved in batches.
+        Returns a dictionary of arrays: path (cells on the shortest route, start excluded), run_1, run_2
+        and score as tester.py would report them for a robot that knows the maze; -1 and nan mark mazes
+        whose goal cannot be reached. """
+    walls = np.asarray(walls)
+    count, dim = walls.shape[0], walls.shape[-1]
+    if goal is None:
+        goal = center_goal(dim)
+    per_batch = max(1, batch_cells // (dim * dim))
+    path = np.empty(count, dtype=np.int64)
+    run_2 = np.empty(count, dtype=np.int64)
+    for first in range(0, count, per_batch):
+        batch = np.ascontiguousarray(walls[first:first + per_batch])
+        path[first:first + per_batch] = distance_maps(batch, goal)[:, 0, 0].astype(np.int64) - 1
+        run_2[first:first + per_batch] = run_lengths(batch, goal)
+    solved = run_2 >= 0
+    run_1 = np.where(solved, run_2 + 1, -1)
+    score = np.where(solved, run_2 + train_score_mult * run_1, np.nan)
+    return {'path': path, 'run_1': run_1, 'run_2': run_2, 'score': score}
+
+
+if __name__ == '__main__':
+    """ Print the oracle baseline of every maze in one or more binary maze files. """
+    parser = argparse.ArgumentParser(description="Optimal scores for every maze of a binary maze corpus.")
+    parser.add_argument('bundles', nargs='+', help="binary maze files")
+    parser.add_argument('--rank', action='store_true', help="list mazes from hardest to easiest")
+    parser.add_argument('--no-verify', action='store_true', help="skip the checksum check")
+    args = parser.parse_args()
+
+    rows = list()
+    for filename in args.bundles:
+        grids, _ = mazefile.load_bundle(filename, verify=not args.no_verify)
+        baselines = oracle_baselines(grids)
+        for index in range(len(grids)):
+            rows.append((filename, index) + tuple(baselines[key][index] for key in ('path', 'run_1', 'run_2', 'score')))
+    if args.rank:
+        rows.sort(key=lambda row: -row[5])
+    print('{:<24} {:>6} {:>6} {:>6} {:>6} {:>8}'.format('maze', 'index', 'path', 'run_1', 'run_2', 'score'))
+    for filename, index, path, run_1, run_2, score in rows:
+        print('{:<24} {:>6} {:>6} {:>6} {:>6} {:>8.3f}'.format(filename, index, path, run_1, run_2, score))
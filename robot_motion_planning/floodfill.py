@@ -0,0 +1,123 @@
+import numpy as np
+
+
+def distance_dtype(cells):
+    """ Smallest unsigned integer type holding every distance on a map of the given number of cells
+        (at most cells) plus a larger sentinel value, so maps stay compact without overflowing. """
+    return np.min_scalar_type(cells + 1)
+
+
+def flood_fill(walls, goal, dtype=None):
+    """ Compute the waterfall (flood fill) distance map for a wall grid.
+
+        walls holds the algorithm wall encoding: bit 2**heading is set when the cell
+        has a wall at that heading (North, East, South, West = 1, 2, 4, 8), with the
+        x axis first and the y axis second. Goal cells get distance 1, every other
+        reachable cell one more than its closest neighbor, unreachable cells 0.
+
+        Rather than visiting one cell at a time, the whole map is swept along each
+        axis in both directions. A sweep carries distances down every straight
+        corridor at once with a running minimum, where each corridor is kept apart
+        from the next by a large per-segment offset, so only one pass is needed per
+        turn in the longest route. Sweeps repeat until the map stops changing.
+        Leading axes are treated as a batch of independent same-size grids.
+        Without a dtype, the map gets the smallest type fitting the grid size. """
+
+    for distance in flood_fill_rounds(walls, goal, dtype):
+        pass
+    return distance
+
+
+def flood_fill_rounds(walls, goal, dtype=None):
+    """ flood_fill as a generator that can be paused between sweep rounds: yields None after every round
+        that changed the map, then the finished map. The walls are read before the first round, so the map
+        belongs to the grid as it was when the generator was first advanced. """
+
+    walls = np.asarray(walls)
+    dim_x, dim_y = walls.shape[-2:]
+    unreached = dim_x * dim_y + 1
+    segment = 2 * unreached # Larger than any distance, so corridors never mix
+    # Offsets reach about segment * dim; 32 bit arithmetic is enough for all but huge mazes and much faster
+    work = np.int32 if segment * (max(dim_x, dim_y) + 1) < 2**30 else np.int64
+
+    # Corridor offsets: the position along the axis plus a jump at every wall
+    offset_x = np.zeros(walls.shape, dtype=work)
+    np.cumsum(walls[..., :-1, :] & 2 != 0, axis=-2, out=offset_x[..., 1:, :])
+    offset_x *= segment
+    offset_x += np.arange(dim_x)[:, None]
+    offset_y = np.zeros(walls.shape, dtype=work)
+    np.cumsum(walls[..., :, :-1] & 1 != 0, axis=-1, out=offset_y[..., :, 1:])
+    offset_y *= segment
+    offset_y += np.arange(dim_y)
+
+    distance = np.full(walls.shape, unreached, dtype=work)
+    for cell in goal:
+        distance[..., cell[0], cell[1]] = 1
+
+    changed = True
+    while changed:
+        previous = distance.copy()
+        for offset, axis in ((offset_x, -2), (offset_y, -1)):
+            np.minimum(distance, np.minimum.accumulate(distance - offset, axis=axis) + offset, out=distance)
+            reverse = np.flip(distance + offset, axis)
+            np.minimum(distance, np.flip(np.minimum.accumulate(reverse, axis=axis), axis) - offset, out=distance)
+        changed = (distance != previous).any()
+        if changed:
+            yield None
+
+    distance[distance == unreached] = 0
+    if dtype is None:
+        dtype = distance_dtype(dim_x * dim_y)
+    yield distance.astype(dtype)
+
+
+def breadth_first(walls, goal):
+    """ Reference waterfall map: the cell by cell breadth-first search flood_fill replaced. """
+    dim_x, dim_y = walls.shape
+    distance = np.zeros(walls.shape, dtype=np.int64)
+    queue = list(goal)
+    for cell in queue:
+        distance[cell[0], cell[1]] = 1
+    offsets = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    for x, y in queue:
+        for heading, (dx, dy) in enumerate(offsets):
+            if walls[x, y] & 2**heading or not (0 <= x + dx < dim_x and 0 <= y + dy < dim_y):
+                continue
+            if distance[x + dx, y + dy] == 0:
+                distance[x + dx, y + dy] = distance[x, y] + 1
+                queue.append((x + dx, y + dy))
+    return distance
+
+
+def unit_tests():
+    """ Test flood_fill against the breadth-first search it replaced. """
+    from mazegen import generate_mazes
+    from walltables import map_walls
+
+    for dim, loops, dead_ends in ((4, 0.0, 1.0), (8, 0.3, 1.0), (16, 0.1, 0.5), (16, 0.0, 0.0)):
+        grids = map_walls(generate_mazes(5, dim, loops, dead_ends, seed=dim))
+        x, y = dim - 2, 1 # A walled-in cell, which stays unreachable
+        grids[0, x, y] = 15
+        grids[0, x, y + 1] |= 4
+        grids[0, x, y - 1] |= 1
+        grids[0, x - 1, y] |= 2
+        grids[0, x + 1, y] |= 8
+        for goal in ([(dim // 2, dim // 2), (dim // 2 - 1, dim // 2 - 1)], [(0, 0)], [(dim - 1, 0), (0, dim - 1)]):
+            batch = flood_fill(grids, goal)
+            for grid, distance in zip(grids, batch):
+                expected = breadth_first(grid, goal)
+                assert (flood_fill(grid, goal) == expected).all()
+                assert (distance == expected).all()
+            assert batch[0, x, y] == 0
+            for distance in flood_fill_rounds(grids[1], goal):
+                pass
+            assert (distance == flood_fill(grids[1], goal)).all()
+
+    # Maps get the smallest type holding every distance
+    assert flood_fill(grids[0], [(0, 0)]).dtype == np.uint16
+    assert flood_fill(grids[0, :4, :4], [(0, 0)]).dtype == np.uint8
+    return True
+
+
+if __name__ == '__main__':
+    unit_tests()
@@ -0,0 +1,190 @@
+"""
+Optional per-step instrumentation for Robot.next_move. A Step_recorder given to a Robot times the
+three phases of every step (decode_sensors, algorithm_choice and the state update), counts the
+planning calls the algorithm made during the step from its stats, and flags steps that overrun a
+deadline. Recorded runs can be exported as per-run latency histograms in JSON lines, or as a Chrome
+trace-event file (chrome://tracing, Perfetto) showing every step on a timeline.
+"""
+from __future__ import print_function, division
+import numpy as np
+import argparse
+import json
+import timeit
+
+timer = timeit.default_timer
+
+# phases of a step, in the order next_move runs them
+phases = ('decode_sensors', 'algorithm_choice', 'update')
+
+# histogram bin edges for step latencies, in microseconds: 1 us to 10 s, four bins per decade
+latency_bins = 10 ** np.arange(0, 7.25, 0.25)
+
+
+class Step_recorder(object):
+    """
+    Collects timing records for the steps of one robot.
+
+    Attributes:
+        deadline: optional time limit per step in seconds; longer steps are marked as overruns.
+        steps:    list of step records: run number, step number, start time and duration (seconds since
+                  the recorder was created), time spent in each phase, algorithm name, changes in the
+                  algorithm's stats counters during the step, whether the step returned 'Reset' and
+                  whether the step overran the deadline.
+        run:      current run number, advanced by start_run when the simulator accepts a Reset.
+    """
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.steps = list()
+        self.run = 1
+        self.origin = timer()
+        self.step_start = None
+        self.phase_start = None
+        self.phase_times = dict()
+        self.stats = dict()
+
+    def begin_step(self, algorithm):
+        """ Start timing a step, remembering the algorithm's counters to difference at the end. """
+        self.stats = dict(getattr(algorithm, 'stats', {}))
+        self.phase_times = dict()
+        self.step_start = self.phase_start = timer()
+
+    def mark(self, phase):
+        """ Close the named phase, charging it the time since the previous mark. """
+        now = timer()
+        self.phase_times[phase] = now - self.phase_start
+        self.phase_start = now
+
+    def end_step(self, algorithm, reset=False):
+        """ Close the update phase and store the step record. reset marks a step that returned 'Reset';
+            the run only advances if the simulator accepts it and calls start_run. """
+        self.mark('update')
+        duration = self.phase_start - self.step_start
+        stats = getattr(algorithm, 'stats', {})
+        counters = dict((key, stats[key] - self.stats.get(key, 0)) for key in stats
+                        if stats[key] != self.stats.get(key, 0))
+        name = algorithm.get_name() if hasattr(algorithm, 'get_name') else type(algorithm).__name__
+        self.steps.append({'run': self.run,
+                           'step': len(self.steps),
+                           'start': self.step_start - self.origin,
+                           'duration': duration,
+                           'phases': self.phase_times,
+                           'algorithm': name,
+                           'counters': counters,
+                           'reset': reset,
+                           'overrun': self.deadline is not None and duration > self.deadline})
+
+    def start_run(self):
+        """ Called by the simulator when it accepts a Reset: later steps belong to the next run. """
+        self.run += 1
+
+    def overruns(self):
+        """ Returns the records of the steps that took longer than the deadline. """
+        return [step for step in self.steps if step['overrun']]
+
+    def histograms(self):
+        """ Summarize each run: step count, overruns, counter totals and a histogram of the step and phase
+            latencies over latency_bins (microseconds). Returns one dictionary per run. """
+        summaries = list()
+        for run in sorted(set(step['run'] for step in self.steps)):
+            steps = [step for step in self.steps if step['run'] == run]
+            totals = dict()
+            for step in steps:
+                for key, count in step['counters'].items():
+                    totals[key] = totals.get(key, 0) + count
+            latencies = {'step': [step['duration'] for step in steps]}
+            for phase in phases:
+                latencies[phase] = [step['phases'].get(phase, 0.0) for step in steps]
+            histograms = dict()
+            for key, samples in latencies.items():
+                samples = np.asarray(samples) * 1e6
+                counts = np.histogram(np.clip(samples, latency_bins[0], latency_bins[-1]), latency_bins)[0]
+                histograms[key] = {'counts': counts.tolist(),
+                                   'total': float(samples.sum()),
+                                   'max': float(samples.max())}
+            summaries.append({'run': run,
+                              'algorithm': steps[0]['algorithm'],
+                              'steps': len(steps),
+                              'overruns': sum(step['overrun'] for step in steps),
+                              'deadline': self.deadline,
+                              'counters': totals,
+                              'bins': latency_bins.tolist(),
+                              'histograms': histograms})
+        return summaries
+
+    def write_json_lines(self, filename, steps=False):
+        """ Write one JSON line per run histogram, followed by one line per step record if steps is set. """
+        with open(filename, 'w') as f_out:
+            for summary in self.histograms():
+                f_out.write(json.dumps(dict(summary, type='run')) + '\n')
+            if steps:
+                for step in self.steps:
+                    f_out.write(json.dumps(dict(step, type='step')) + '\n')
+
+    def trace_events(self):
+        """ Chrome trace events: one complete event per step with nested events for its phases, an instant
+            event per overrun and counter events for the planning calls. Times are in microseconds. """
+        events = list()
+        for step in self.steps:
+            start = step['start'] * 1e6
+            args = dict(step['counters'], run=step['run'], step=step['step'])
+            events.append({'name': 'step', 'cat': step['algorithm'], 'ph': 'X', 'pid': 1, 'tid': step['run'],
+                           'ts': start, 'dur': step['duration'] * 1e6, 'args': args})
+            for phase in phases:
+                if phase in step['phases']:
+                    events.append({'name': phase, 'cat': step['algorithm'], 'ph': 'X', 'pid': 1,
+                                   'tid': step['run'], 'ts': start, 'dur': step['phases'][phase] * 1e6})
+                    start += step['phases'][phase] * 1e6
+            if step['overrun']:
+                events.append({'name': 'deadline overrun', 'cat': step['algorithm'], 'ph': 'i', 's': 't',
+                               'pid': 1, 'tid': step['run'], 'ts': step['start'] * 1e6, 'args': args})
+            if step['counters']:
+                events.append({'name': 'planning calls', 'ph': 'C', 'pid': 1, 'ts': step['start'] * 1e6,
+                               'args': step['counters']})
+        return events
+
+    def write_trace(self, filename):
+        """ Write the steps as a Chrome trace-event file. """
+        with open(filename, 'w') as f_out:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f_out)
+
+
+if __name__ == '__main__':
+    """ Run one algorithm on a maze with instrumentation and export the recorded steps. """
+    from maze import Maze
+    from robot import Robot
+    from tester import run_trial, algorithms
+
+    registry = dict((algorithms[i].__name__, algorithms[i]) for i in algorithms)
+    parser = argparse.ArgumentParser(description="Record per-step planning latency of one algorithm.")
+    parser.add_argument('maze', help="maze file")
+    parser.add_argument('--algorithm', default='Search_waterfall', choices=sorted(registry), help="algorithm class")
+    parser.add_argument('--deadline', type=float, default=None, help="step deadline in milliseconds")
+    parser.add_argument('--step-budget', type=float, default=None,
+                        help="planning time per step in milliseconds, for algorithms with an anytime mode")
+    parser.add_argument('--jsonl', help="write run histograms and step records as JSON lines")
+    parser.add_argument('--trace', help="write a Chrome trace-event file")
+    args = parser.parse_args()
+
+    options = dict()
+    if args.step_budget is not None:
+        if not registry[args.algorithm].anytime:
+            parser.error("--step-budget is not supported by " + args.algorithm)
+        options['step_budget'] = args.step_budget / 1000.
+
+    recorder = Step_recorder(None if args.deadline is None else args.deadline / 1000.)
+    def robot_class(*robot_args, **robot_kwargs):
+        return Robot(*robot_args, recorder=recorder, **robot_kwargs)
+    run_trial(Maze(args.maze), registry[args.algorithm], seed=0, robot_class=robot_class, algorithm_options=options)
+
+    for summary in recorder.histograms():
+        step = summary['histograms']['step']
+        print('run {}: {} steps, {:.1f} ms total, {:.1f} us max, {} overruns, {}'.format(
+            summary['run'], summary['steps'], step['total'] / 1000, step['max'], summary['overruns'],
+            ', '.join('{} {}'.format(key, count) for key, count in sorted(summary['counters'].items()))))
+    for step in recorder.overruns():
+        print('overrun: run {} step {} took {:.1f} us in {}'.format(step['run'], step['step'],
+                                                                   step['duration'] * 1e6, step['algorithm']))
+    if args.jsonl:
+        recorder.write_json_lines(args.jsonl, steps=True)
+    if args.trace:
+        recorder.write_trace(args.trace)
@@ -0,0 +1,178 @@
+"""
+Lockstep simulator: many robots run the tester.py rules side by side on one shared maze. Positions and
+headings of all robots live in NumPy arrays, so sensing, rotation, wall-clipped movement and the goal
+and timeout checks are done for every robot in one array operation per time step. Only next_move (and
+with it each robot's algorithm_choice) is still called robot by robot. Every robot gets the same result
+dictionary run_trial would give it, which makes this the cheap way to score many seeds of a stochastic
+walker, such as the default Robot or the Algorithm wall follower.
+"""
+from __future__ import print_function, division
+from maze import Maze
+from robot import Robot
+from tester import max_time, train_score_mult, algorithms
+import numpy as np
+import argparse
+
+# sensor directions (left, front, right) relative to the heading, and the cell offset of each heading
+sensor_turns = np.array([-1, 0, 1])
+move_offsets = np.array([[0, 1], [1, 0], [0, -1], [-1, 0]])
+
+# change in heading index (up, right, down, left) for each valid rotation
+heading_turns = {-90: 3, 0: 0, 90: 1}
+
+
+class Lockstep_simulator(object):
+    """
+    Runs a group of robots through the two runs of a trial in lockstep on one maze.
+
+    Attributes:
+        testmaze:   shared Maze the robots run in.
+        robots:     Robot instances, one per simulated robot.
+        location:   (N, 2) integer array of robot cells.
+        heading:    integer array of robot headings, 0 - 3 for up, right, down, left.
+        run:        integer array holding the run (0 or 1) each robot is on.
+        hit_goal:   boolean array, robot has entered the goal during its current run.
+        active:     boolean array, robot is still running.
+        timeout:    boolean array, robot ran out of time.
+        wall_bumps: integer array counting moves stopped by a wall.
+        run_1:      time step of each robot's reset after its first run, 0 until then.
+        run_2:      length of each robot's second run, 0 until completed.
+        steps:      time steps each robot used, counted until it finished.
+        time:       time steps taken so far, shared by all robots.
+    """
+    def __init__(self, testmaze, robots):
+        self.testmaze = testmaze
+        self.robots = list(robots)
+        count = len(self.robots)
+        self.location = np.zeros((count, 2), dtype=np.int64)
+        self.heading = np.zeros(count, dtype=np.int64)
+        self.run = np.zeros(count, dtype=np.int64)
+        self.hit_goal = np.zeros(count, dtype=bool)
+        self.active = np.ones(count, dtype=bool)
+        self.timeout = np.zeros(count, dtype=bool)
+        self.wall_bumps = np.zeros(count, dtype=np.int64)
+        self.run_1 = np.zeros(count, dtype=np.int64)
+        self.run_2 = np.zeros(count, dtype=np.int64)
+        self.steps = np.zeros(count, dtype=np.int64)
+        self.time = 0
+        dim = testmaze.get_dim()
+        self.goal_bounds = (dim // 2 - 1, dim // 2)
+
+    def sense(self, robots):
+        """ Sensor readings (left, front, right distances to walls) of the given robots, one row each. """
+        x, y = self.location[robots, 0], self.location[robots, 1]
+        directions = (self.heading[robots, None] + sensor_turns) % 4
+        return self.testmaze.wall_distances[x[:, None], y[:, None], directions]
+
+    def step(self):
+        """ Advance every active robot by one time step. Returns False once no robot is left running. """
+        self.time += 1
+        if self.time > max_time:
+            self.timeout |= self.active
+            self.steps[self.active] = max_time
+            self.active[:] = False
+            return False
+
+        robots = np.nonzero(self.active)[0]
+        sensing = self.sense(robots).tolist()
+        turns = np.zeros(len(robots), dtype=np.int64)
+        moves = np.zeros(len(robots), dtype=np.int64)
+        acting = np.ones(len(robots), dtype=bool)
+        for k, i in enumerate(robots):
+            rotation, movement = self.robots[i].next_move(sensing[k])
+            if (rotation, movement) == ('Reset', 'Reset'):
+                acting[k] = False
+                if self.run[i] == 0 and self.hit_goal[i]:
+                    self.run[i] = 1
+                    self.run_1[i] = self.time
+                    self.hit_goal[i] = False
+                    self.location[i] = 0
+                    self.heading[i] = 0
+                    recorder = getattr(self.robots[i], 'recorder', None)
+                    if recorder: recorder.start_run()
+                continue
+            turns[k] = heading_turns.get(rotation, 0)
+            moves[k] = max(min(int(movement), 3), -3)
+        robots, turns, moves = robots[acting], turns[acting], moves[acting]
+
+        # Rotate, then move as far as the walls ahead (or behind, when reversing) allow
+        heading = (self.heading[robots] + turns) % 4
+        self.heading[robots] = heading
+        x, y = self.location[robots, 0], self.location[robots, 1]
+        ahead = self.testmaze.wall_distances[x, y, heading].astype(np.int64)
+        behind = self.testmaze.wall_distances[x, y, (heading + 2) % 4].astype(np.int64)
+        moved = np.where(moves >= 0, np.minimum(moves, ahead), -np.minimum(-moves, behind))
+        self.wall_bumps[robots] += (moves > ahead) | (-moves > behind)
+        self.location[robots] += moved[:, None] * move_offsets[heading]
+
+        # Goal check: entering the goal completes the second run
+        location = self.location[robots]
+        in_goal = ((location >= self.goal_bounds[0]) & (location <= self.goal_bounds[1])).all(axis=1)
+        self.hit_goal[robots] |= in_goal
+        done = robots[in_goal & (self.run[robots] == 1)]
+        self.run_2[done] = self.time - self.run_1[done]
+        self.steps[done] = self.time
+        self.active[done] = False
+        return self.active.any()
+
+    def simulate(self):
+        """ Step until every robot has finished or timed out. Returns one run_trial style result dictionary
+            per robot. """
+        while self.step():
+            pass
+        results = list()
+        for i, robot in enumerate(self.robots):
+            algorithm = robot.algorithm
+            run_1 = int(self.run_1[i]) if self.run[i] == 1 else None
+            run_2 = int(self.run_2[i]) if self.run_2[i] else None
+            score = run_2 + train_score_mult * run_1 if run_2 is not None else None
+            results.append({'algorithm': algorithm.get_name() if algorithm is not robot else 'Default Robot',
+                            'run_1': run_1,
+                            'run_2': run_2,
+                            'score': score,
+                            'timeout': bool(self.timeout[i]),
+                            'wall_bumps': int(self.wall_bumps[i]),
+                            'steps': int(self.steps[i])})
+        return results
+
+
+def run_seeds(testmaze, algorithm_class=None, seeds=range(100), robot_class=Robot):
+    """ Score one robot per seed in lockstep on the given maze. Without an algorithm class the robots use
+        the built-in default walker of Robot. Returns the result dictionaries, each tagged with its seed. """
+    maze_dim = testmaze.get_dim()
+    center = maze_dim // 2
+    goal = [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
+    robots = list()
+    for seed in seeds:
+        if algorithm_class is None:
+            robots.append(robot_class(maze_dim, seed=seed))
+            continue
+        algorithm = algorithm_class(maze_dim, goal)
+        if algorithm.get_name() == "Oracle Waterfall":
+            algorithm.maze_oracle(testmaze)
+        robots.append(robot_class(maze_dim, algorithm, seed=seed))
+    results = Lockstep_simulator(testmaze, robots).simulate()
+    for seed, result in zip(seeds, results):
+        result['seed'] = seed
+    return results
+
+
+if __name__ == '__main__':
+    """ Score many seeds of one algorithm on each maze and summarize the spread of results. """
+    registry = dict((algorithms[i].__name__, algorithms[i]) for i in algorithms)
+    parser = argparse.ArgumentParser(description="Run many seeded robots in lockstep on each maze.")
+    parser.add_argument('mazes', nargs='+', help="maze files")
+    parser.add_argument('--algorithm', default='default', choices=['default'] + sorted(registry),
+                        help="algorithm class, or default for the Robot random walker")
+    parser.add_argument('--seeds', type=int, default=100, help="number of seeded robots per maze")
+    args = parser.parse_args()
+
+    algorithm_class = registry.get(args.algorithm)
+    for filename in args.mazes:
+        results = run_seeds(Maze(filename), algorithm_class, range(args.seeds))
+        scores = np.array([r['score'] for r in results if r['score'] is not None])
+        print('{}: {} {} robots, {} completed, {} timed out'.format(
+            filename, len(results), results[0]['algorithm'], len(scores), sum(r['timeout'] for r in results)))
+        if len(scores):
+            print('  score min {:.3f}  median {:.3f}  mean {:.3f}  max {:.3f}'.format(
+                scores.min(), np.median(scores), scores.mean(), scores.max()))
@@ -1,30 +1,51 @@
 import numpy as np
-import turtle
+import mazefile
+
+# wall bit and index into the sensing table for each direction
+dir_int = {'u': 1, 'r': 2, 'd': 4, 'l': 8,
+           'up': 1, 'right': 2, 'down': 4, 'left': 8}
+dir_index = {'u': 0, 'r': 1, 'd': 2, 'l': 3,
+             'up': 0, 'right': 1, 'down': 2, 'left': 3}
 
 class Maze(object):
-    def __init__(self, filename):
+    def __init__(self, filename, index=0, validate=True):
         '''
-        Maze objects have two main attributes:
+        Maze objects have three main attributes:
         - dim: mazes should be square, with sides of even length. (integer)
         - walls: passages are coded as a 4-bit number, with a bit value taking
             0 if there is a wall and 1 if there is no wall. The 1s register
             corresponds with a square's top edge, 2s register the right edge,
             4s register the bottom edge, and 8s register the left edge. (numpy
             array)
+        - wall_distances: number of open cells from each cell to the nearest
+            wall in each direction, indexed [x, y, direction] with directions
+            ordered up, right, down, left. (numpy array)
+
+        The maze is read from a text file, or from a binary maze file (see
+        mazefile.py), in which case index selects the maze within the file and
+        walls is a read-only memory map of the stored grid. The checksum
+        attribute holds the stored CRC-32 of a binary maze, None for text.
+        Setting validate to False skips the wall consistency check for binary
+        mazes, which were checked when written; text mazes are always checked.
 
         The initialization function also performs some consistency checks for
         wall positioning.
         '''
-        with open(filename, 'rb') as f_in:
+        self.checksum = None
+        if mazefile.is_binary(filename):
+            self.walls, self.checksum = mazefile.load_binary(filename, index)
+            self.dim = self.walls.shape[0]
+        else:
+            with open(filename, 'rb') as f_in:
 
-            # First line should be an integer with the maze dimensions
-            self.dim = int(f_in.next())
+                # First line should be an integer with the maze dimensions
+                self.dim = int(f_in.next())
 
-            # Subsequent lines describe the permissability of walls
-            walls = []
-            for line in f_in:
-                walls.append(map(int,line.split(',')))
-            self.walls = np.array(walls)
+                # Subsequent lines describe the permissability of walls
+                walls = []
+                for line in f_in:
+                    walls.append(map(int,line.split(',')))
+                self.walls = np.array(walls)
 
         # Perform validation on maze
         # Maze dimensions
@@ -33,18 +54,12 @@ class Maze(object):
         if self.walls.shape != (self.dim, self.dim):
             raise Exception('Maze shape does not match dimension attribute!')
 
-        # Wall permeability
-        wall_errors = []
-        # vertical walls
-        for x in range(self.dim-1):
-            for y in range(self.dim):
-                if (self.walls[x,y] & 2 != 0) != (self.walls[x+1,y] & 8 != 0):
-                    wall_errors.append([(x,y), 'v'])
-        # horizontal walls
-        for y in range(self.dim-1):
-            for x in range(self.dim):
-                if (self.walls[x,y] & 1 != 0) != (self.walls[x,y+1] & 4 != 0):
-                    wall_errors.append([(x,y), 'h'])
+        # Wall permeability, skipped on request for binary mazes whose stored
+        # checksum shows they are unchanged since they were validated
+        if validate or self.checksum is None:
+            wall_errors = self.wall_errors()
+        else:
+            wall_errors = []
 
         if wall_errors:
             for cell, wall_type in wall_errors:
@@ -56,6 +71,40 @@ class Maze(object):
                     print 'Inconsistent horizontal wall betweeen {} and {}'.format(cell, cell2)
             raise Exception('Consistency errors found in wall specifications!')
 
+        self.wall_distances = self.ray_cast()
+
+
+    def wall_errors(self):
+        """
+        Returns a list of [(x, y), wall_type] entries, one for every pair of
+        adjacent cells that disagree about the wall between them. Wall type
+        'v' marks the vertical wall between (x, y) and (x+1, y), 'h' the
+        horizontal wall between (x, y) and (x, y+1). Each check compares the
+        grid with a copy of itself shifted by one cell.
+        """
+        vertical = (self.walls[:-1, :] & 2 != 0) != (self.walls[1:, :] & 8 != 0)
+        horizontal = (self.walls[:, :-1] & 1 != 0) != (self.walls[:, 1:] & 4 != 0)
+        wall_errors = [[(int(x), int(y)), 'v'] for x, y in np.argwhere(vertical)]
+        wall_errors += [[(int(x), int(y)), 'h'] for y, x in np.argwhere(horizontal.T)]
+        return wall_errors
+
+
+    def ray_cast(self):
+        """
+        Returns an array holding, for every cell and direction, the number of
+        open cells to the nearest wall. Each direction is filled one row or
+        column at a time, working back from the edge of the maze it faces.
+        """
+        dtype = np.uint8 if self.dim < 256 else np.uint16
+        distances = np.zeros((self.dim, self.dim, 4), dtype=dtype)
+        up, right, down, left = [(self.walls & bit != 0) for bit in (1, 2, 4, 8)]
+        for i in range(1, self.dim):
+            distances[:, -1-i, 0] = up[:, -1-i] * (distances[:, -i, 0] + 1)
+            distances[-1-i, :, 1] = right[-1-i, :] * (distances[-i, :, 1] + 1)
+            distances[:, i, 2] = down[:, i] * (distances[:, i-1, 2] + 1)
+            distances[i, :, 3] = left[i, :] * (distances[i-1, :, 3] + 1)
+        return distances
+
 
     def is_permissible(self, cell, direction):
         """
@@ -64,8 +113,6 @@ class Maze(object):
         input as single letter 'u', 'r', 'd', 'l', or complete words 'up', 
         'right', 'down', 'left'.
         """
-        dir_int = {'u': 1, 'r': 2, 'd': 4, 'l': 8,
-                   'up': 1, 'right': 2, 'down': 4, 'left': 8}
         try:
             return (self.walls[tuple(cell)] & dir_int[direction] != 0)
         except:
@@ -79,20 +126,22 @@ class Maze(object):
         may be input as a single letter 'u', 'r', 'd', 'l', or complete words
         'up', 'right', 'down', 'left'.
         """
-        dir_move = {'u': [0, 1], 'r': [1, 0], 'd': [0, -1], 'l': [-1, 0],
-                    'up': [0, 1], 'right': [1, 0], 'down': [0, -1], 'left': [-1, 0]}
-
-        sensing = True
-        distance = 0
-        curr_cell = list(cell) # make copy to preserve original
-        while sensing:
-            if self.is_permissible(curr_cell, direction):
-                distance += 1
-                curr_cell[0] += dir_move[direction][0]
-                curr_cell[1] += dir_move[direction][1]
-            else:
-                sensing = False
-        return distance
+        if direction not in dir_index:
+            print('Invalid direction provided!')
+            return 0
+        return int(self.wall_distances[cell[0], cell[1], dir_index[direction]])
+
+
+    def dist_to_walls(self, cells, directions):
+        """
+        Batched form of dist_to_wall. Cells is a sequence or array of [x, y]
+        pairs and directions a matching sequence of direction names (as for
+        dist_to_wall) or direction indices ordered up, right, down, left.
+        Returns a numpy array with one distance per cell.
+        """
+        cells = np.asarray(cells)
+        directions = [dir_index.get(d, d) for d in directions]
+        return self.wall_distances[cells[:, 0], cells[:, 1], directions]
     
     
     def get_dim(self):
@@ -0,0 +1,100 @@
+"""
+Binary maze container. A file holds one or more mazes of the same dimension:
+
+    header:    magic b'MAZE', format version (uint16), reserved (uint16),
+               dimension (uint32), number of mazes (uint32), little endian
+    checksums: one CRC-32 (uint32) of each maze's wall grid
+    grids:     the wall grids, dim * dim uint8 values each, in the same
+               [x, y] layout and wall encoding as Maze.walls
+
+A single maze file is simply a bundle holding one maze. Grids are opened with
+np.memmap, so loading one costs a header read and never copies the grid.
+"""
+import numpy as np
+import struct
+import zlib
+import sys
+
+magic = b'MAZE'
+version = 1
+header = struct.Struct('<4sHHII')
+checksum_dtype = np.dtype('<u4')
+
+
+def is_binary(filename):
+    """ Returns True if the file starts with the binary maze header. """
+    with open(filename, 'rb') as f_in:
+        return f_in.read(len(magic)) == magic
+
+
+def read_header(filename):
+    """ Returns the dimension, number of mazes and stored checksums of a binary maze file. """
+    with open(filename, 'rb') as f_in:
+        tag, file_version, _, dim, count = header.unpack(f_in.read(header.size))
+        if tag != magic:
+            raise Exception('Not a binary maze file!')
+        if file_version != version:
+            raise Exception('Unsupported binary maze format version {}!'.format(file_version))
+        checksums = np.frombuffer(f_in.read(count * checksum_dtype.itemsize), dtype=checksum_dtype)
+    return dim, count, checksums
+
+
+def grid_checksum(walls):
+    """ CRC-32 of a wall grid, computed over its uint8 values. """
+    walls = np.ascontiguousarray(walls, dtype=np.uint8)
+    return zlib.crc32(walls) & 0xffffffff
+
+
+def load_binary(filename, index=0, verify=True):
+    """ Memory map maze number index of a binary maze file. Returns the read-only wall grid and its
+        stored checksum. With verify set, the grid is checked against the checksum. """
+    dim, count, checksums = read_header(filename)
+    if not 0 <= index < count:
+        raise Exception('Maze index {} out of range for {} mazes!'.format(index, count))
+    offset = header.size + count * checksum_dtype.itemsize + index * dim * dim
+    walls = np.memmap(filename, dtype=np.uint8, mode='r', offset=offset, shape=(dim, dim))
+    checksum = int(checksums[index])
+    if verify and grid_checksum(walls) != checksum:
+        raise Exception('Checksum mismatch for maze {} in {}!'.format(index, filename))
+    return walls, checksum
+
+
+def load_bundle(filename, verify=True):
+    """ Memory map every maze of a binary maze file as one read-only (count, dim, dim) array. Returns
+        the grids and their stored checksums. With verify set, every grid is checked. """
+    dim, count, checksums = read_header(filename)
+    offset = header.size + count * checksum_dtype.itemsize
+    grids = np.memmap(filename, dtype=np.uint8, mode='r', offset=offset, shape=(count, dim, dim))
+    if verify:
+        for index in range(count):
+            if grid_checksum(grids[index]) != checksums[index]:
+                raise Exception('Checksum mismatch for maze {} in {}!'.format(index, filename))
+    return grids, checksums
+
+
+def write_binary(filename, grids):
+    """ Write one or more same-size wall grids (Maze.walls arrays) to a binary maze file. """
+    grids = [np.asarray(walls) for walls in grids]
+    dim = grids[0].shape[0]
+    for walls in grids:
+        if walls.shape != (dim, dim):
+            raise Exception('All mazes in a bundle must share one dimension!')
+        if walls.min() < 0 or walls.max() > 15:
+            raise Exception('Wall values must lie in 0 - 15!')
+    checksums = np.array([grid_checksum(walls) for walls in grids], dtype=checksum_dtype)
+    with open(filename, 'wb') as f_out:
+        f_out.write(header.pack(magic, version, 0, dim, len(grids)))
+        f_out.write(checksums.tobytes())
+        for walls in grids:
+            f_out.write(walls.astype(np.uint8).tobytes())
+
+
+def convert(text_files, filename):
+    """ Convert one or more text maze files into a single binary maze file. """
+    from maze import Maze
+    write_binary(filename, [Maze(text_file).walls for text_file in text_files])
+
+
+if __name__ == '__main__':
+    """ Usage: mazefile.py output_file maze_file [maze_file ...] """
+    convert(sys.argv[2:], sys.argv[1])
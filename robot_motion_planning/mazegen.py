@@ -0,0 +1,189 @@
+"""
+Seeded maze generator for building benchmark corpora. Mazes come out as wall grids in the
+Maze.walls encoding (bit set = no wall: 1 up, 2 right, 4 down, 8 left), closed on the outside
+and consistent between neighbors, for any even dimension.
+
+Mazes start as a random spanning tree of the cell grid, a perfect maze, grown for a whole batch
+of mazes at once with Boruvka's algorithm: every round, each connected region opens its lowest
+weight wall into another region, so a few array passes join all the cells. Optional passes then
+add loops by opening further walls and remove a share of the dead ends.
+"""
+import numpy as np
+import argparse
+import mazefile
+
+# cells per generation batch, bounding memory use for large corpora
+batch_cells = 2**22
+
+
+def edge_grid(dim):
+    """ Returns the two cells joined by every interior wall of a dim x dim maze as flat cell indices
+        (x * dim + y): the walls right of each cell first, then the walls above each cell. """
+    cells = np.arange(dim * dim, dtype=np.int32).reshape(dim, dim)
+    u = np.concatenate([cells[:-1, :].ravel(), cells[:, :-1].ravel()])
+    v = np.concatenate([cells[1:, :].ravel(), cells[:, 1:].ravel()])
+    return u, v
+
+
+def spanning_forest(u, v, nodes, rng, joined=None):
+    """ Open a random spanning tree over each connected set of nodes. Edges get random distinct
+        weights; each Boruvka round, every component picks its lightest edge to another component,
+        then components are relabelled by pointer jumping. joined optionally gives initial component
+        labels for nodes that already belong together. Returns a boolean mask of opened edges. """
+    order = rng.permutation(len(u))   # position in order is the edge weight
+    u, v = u[order], v[order]
+    opened = np.zeros(len(u), dtype=bool)
+    component = np.arange(nodes, dtype=np.int32) if joined is None else joined.astype(np.int32)
+    live = np.arange(len(u))
+    while True:
+        # Edges inside a component stay inside it, so only edges between components are kept
+        cu, cv = component[u[live]], component[v[live]]
+        cross = cu != cv
+        live, cu, cv = live[cross], cu[cross], cv[cross]
+        if live.size == 0:
+            break
+
+        # Lightest edge of each component: ends listed in weight order, then assigned in reverse
+        # so that each component is left holding its first (lightest) position
+        ends = np.column_stack([cu, cv]).ravel()
+        first = np.full(nodes, -1, dtype=np.int32)
+        first[ends[::-1]] = np.arange(len(ends), dtype=np.int32)[::-1]
+        labels = np.nonzero(first >= 0)[0]
+        pick = first[labels] // 2
+        opened[live[pick]] = True
+
+        # Point every component at the one across its chosen edge, breaking mutual choices by label
+        other = np.where(cu[pick] == labels, cv[pick], cu[pick])
+        parent = np.arange(nodes, dtype=np.int32)
+        parent[labels] = other
+        mutual = (parent[other] == labels) & (labels < other)
+        parent[labels[mutual]] = labels[mutual]
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+        component = parent[component]
+    result = np.zeros(len(u), dtype=bool)
+    result[order] = opened
+    return result
+
+
+def generate_mazes(count, dim, loops=0.0, dead_ends=1.0, center_goal=True, seed=None):
+    """ Generate count mazes of the given even dimension. Returns a (count, dim, dim) uint8 array of
+        Maze.walls grids.
+
+        loops:       probability of opening each interior wall left closed by the spanning tree
+        dead_ends:   share of dead ends to keep; the others get one more wall opened
+        center_goal: make the central 2 x 2 cells one open goal room with a single entrance
+        seed:        seed for the random state, so a corpus can be reproduced """
+
+    if dim % 2 or dim < 2:
+        raise Exception('Maze dimensions must be even in length!')
+    rng = np.random.RandomState(seed)
+    per_batch = max(1, batch_cells // (dim * dim))
+    mazes = [generate_batch(min(per_batch, count - start), dim, loops, dead_ends, center_goal, rng)
+             for start in range(0, count, per_batch)]
+    return np.concatenate(mazes) if mazes else np.zeros((0, dim, dim), dtype=np.uint8)
+
+
+def generate_batch(count, dim, loops, dead_ends, center_goal, rng):
+    """ Generate one batch of mazes for generate_mazes. """
+    cells = dim * dim
+    u, v = edge_grid(dim)
+    edges = len(u)
+    offsets = np.repeat(np.arange(count, dtype=np.int32) * cells, edges)
+    batch_u = np.tile(u, count) + offsets
+    batch_v = np.tile(v, count) + offsets
+
+    # The goal room: its inner walls are open and only the spanning tree may open its outer walls
+    room = np.zeros((dim, dim), dtype=bool)
+    fixed = np.zeros(edges, dtype=bool)
+    joined = None
+    if center_goal:
+        c = dim // 2
+        room[c-1:c+1, c-1:c+1] = True
+        in_room = room.ravel()
+        fixed = in_room[u] | in_room[v]
+        joined = np.arange(count * cells).reshape(count, cells)
+        joined[:, in_room] = joined[:, [(c-1)*dim + c-1]]
+        joined = joined.ravel()
+
+    opened = spanning_forest(batch_u, batch_v, count * cells, rng, joined).reshape(count, edges)
+    if center_goal:
+        opened |= in_room[u] & in_room[v]
+
+    if loops > 0:
+        opened |= (rng.random_sample((count, edges)) < loops) & ~fixed
+
+    walls = encode(opened, dim)
+    if dead_ends < 1:
+        walls = remove_dead_ends(walls, room, dead_ends, rng)
+    return walls
+
+
+def encode(opened, dim):
+    """ Convert a (count, edges) mask of opened interior walls into Maze.walls grids. """
+    count = opened.shape[0]
+    split = (dim - 1) * dim
+    right = opened[:, :split].reshape(count, dim - 1, dim)
+    up = opened[:, split:].reshape(count, dim, dim - 1)
+    walls = np.zeros((count, dim, dim), dtype=np.uint8)
+    walls[:, :-1, :] |= right * np.uint8(2)
+    walls[:, 1:, :] |= right * np.uint8(8)
+    walls[:, :, :-1] |= up * np.uint8(1)
+    walls[:, :, 1:] |= up * np.uint8(4)
+    return walls
+
+
+def remove_dead_ends(walls, room, dead_ends, rng):
+    """ Open one more wall in a random (1 - dead_ends) share of the dead-end cells, picked at random
+        among the cell's closed interior walls that do not touch the goal room. """
+    open_sides = sum((walls & bit != 0).astype(np.uint8) for bit in (1, 2, 4, 8))
+    braid = (open_sides == 1) & (rng.random_sample(walls.shape) >= dead_ends)
+
+    # Candidate walls per direction (up, right, down, left): closed, interior and away from the room
+    candidates = np.zeros(walls.shape + (4,), dtype=bool)
+    candidates[:, :, :-1, 0] = ~(room[:, :-1] | room[:, 1:])
+    candidates[:, :-1, :, 1] = ~(room[:-1, :] | room[1:, :])
+    candidates[:, :, 1:, 2] = ~(room[:, 1:] | room[:, :-1])
+    candidates[:, 1:, :, 3] = ~(room[1:, :] | room[:-1, :])
+    for d, bit in enumerate((1, 2, 4, 8)):
+        candidates[..., d] &= (walls & bit) == 0
+    scores = rng.random_sample(candidates.shape) * candidates
+    choice = scores.argmax(axis=-1)
+    braid &= scores.max(axis=-1) > 0
+
+    walls = walls.copy()
+    for d, (bit, opposite, dx, dy) in enumerate(((1, 4, 0, 1), (2, 8, 1, 0), (4, 1, 0, -1), (8, 2, -1, 0))):
+        m, x, y = np.nonzero(braid & (choice == d))
+        walls[m, x, y] |= bit
+        walls[m, x + dx, y + dy] |= opposite
+    return walls
+
+
+def write_text(filename, walls):
+    """ Write a wall grid in the text maze format read by Maze. """
+    with open(filename, 'w') as f_out:
+        f_out.write('{}\n'.format(walls.shape[0]))
+        for row in walls:
+            f_out.write(','.join(str(int(cell)) for cell in row) + '\n')
+
+
+if __name__ == '__main__':
+    """ Generate a corpus: a text maze for a single .txt output, otherwise a binary maze bundle. """
+    parser = argparse.ArgumentParser(description="Generate random mazes.")
+    parser.add_argument('output', help="output file, .txt for a single text maze")
+    parser.add_argument('dim', type=int, help="maze dimension, even")
+    parser.add_argument('--count', type=int, default=1, help="number of mazes")
+    parser.add_argument('--loops', type=float, default=0.0, help="probability of opening each extra wall")
+    parser.add_argument('--dead-ends', type=float, default=1.0, help="share of dead ends to keep")
+    parser.add_argument('--no-center', action='store_true', help="no central goal room")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    mazes = generate_mazes(args.count, args.dim, args.loops, args.dead_ends, not args.no_center, args.seed)
+    if args.output.endswith('.txt') and args.count == 1:
+        write_text(args.output, mazes[0])
+    else:
+        mazefile.write_binary(args.output, mazes)
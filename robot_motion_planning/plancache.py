@@ -0,0 +1,102 @@
+"""
+Content-addressed cache of planning results. Entries hold a waterfall distance map and the plan built
+from it, keyed by a hash of the wall grid, goal and start they were computed for, so the same maze gives
+the same key in any process. A bounded least-recently-used layer in memory sits in front of an optional
+directory on local disk, where each entry is one .npz file named by its key.
+"""
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import os
+import tempfile
+
+# bumped whenever the planners change what they return, so stale disk entries are never matched
+cache_version = 2
+
+
+class Plan_cache(object):
+    """
+    Two level cache of (distance map, plan) entries.
+
+    Attributes:
+        directory:   directory holding the disk entries, None for a memory-only cache.
+        max_entries: number of entries kept in memory; the least recently used one is dropped first.
+        entries:     OrderedDict of the entries in memory, least recently used first.
+        stats:       counts of memory hits, disk hits and misses.
+    """
+    def __init__(self, directory=None, max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def key(walls, goal, start=(0, 0), heading=0):
+        """ Hex digest identifying a planning problem: the wall layer of a map (algorithm encoding), the goal
+            cells in any order and the start location and heading. """
+        walls = np.ascontiguousarray(walls, dtype=np.uint8)
+        digest = hashlib.sha1()
+        digest.update(repr((cache_version, walls.shape, sorted(tuple(cell) for cell in goal),
+                            tuple(start), heading)).encode('ascii'))
+        digest.update(walls.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """ Returns the (distance map, plan) entry for key, or None if it is not cached. Plans come back as
+            lists of (rotation, movement) tuples; callers must not modify the distance map. """
+        if key in self.entries:
+            entry = self.entries.pop(key)
+            self.entries[key] = entry # Most recently used entries go last
+            self.stats['memory_hits'] += 1
+            return entry
+        entry = self.read(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['disk_hits'] += 1
+        self.remember(key, entry)
+        return entry
+
+    def put(self, key, distances, plan):
+        """ Store a distance map and plan under key, in memory and on disk. Returns the stored entry. """
+        distances = np.array(distances)
+        distances.flags.writeable = False
+        entry = (distances, [(int(rotation), int(movement)) for rotation, movement in plan])
+        self.remember(key, entry)
+        self.write(key, entry)
+        return entry
+
+    def remember(self, key, entry):
+        """ Add an entry to the memory layer, dropping the least recently used entries over the bound. """
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def read(self, key):
+        """ Load an entry from disk; None when there is no disk layer or no readable entry. """
+        if self.directory is None or not os.path.exists(self.path(key)):
+            return None
+        try:
+            with np.load(self.path(key)) as data:
+                distances = data['distances']
+                plan = [(int(rotation), int(movement)) for rotation, movement in data['plan']]
+        except (IOError, OSError, ValueError, KeyError):
+            return None # A damaged entry is a miss; it gets rewritten
+        distances.flags.writeable = False
+        return distances, plan
+
+    def write(self, key, entry):
+        """ Save an entry to disk. The file is written under a temporary name and then renamed, so
+            concurrent readers never see a partial entry. """
+        if self.directory is None:
+            return
+        distances, plan = entry
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as f_out:
+            np.savez(f_out, distances=distances, plan=np.array(plan, dtype=np.int16).reshape(-1, 2))
+        os.rename(temporary, self.path(key))
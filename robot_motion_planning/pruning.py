@@ -0,0 +1,102 @@
+"""
+Dead-end pruning of wall grids in the algorithm encoding (bit set = wall). A dead end, a cell with a single
+open side, can never lie on a route between two other cells, so it is closed off, which may turn the cell it
+opened onto into a dead end in turn. Repeating this fills whole dead-end branches, leaving only the loops of
+the maze and the corridors between the cells that must be kept, such as the start and the goal.
+
+Each round works on index arrays of the cells that just became dead ends rather than on the whole grid, so a
+round costs time in proportion to the number of branches being filled, and an already pruned grid can be
+updated after new walls are found by checking only the cells that gained them.
+"""
+import numpy as np
+from walltables import dead_end_table, dead_end_heading_table, heading_offset_table, wall_bit_table
+
+
+def fill_dead_ends(walls, keep, cells=None):
+    """ Fill the dead-end branches of a wall grid in place. keep masks the cells that are never filled, and
+        cells optionally gives the (xs, ys) index arrays of the only cells that can have become dead ends,
+        every cell being checked by default. Filled cells get all four walls, and their open neighbors the
+        matching wall. Returns a mask of the cells filled by this call. """
+
+    filled = np.zeros(walls.shape, dtype=bool)
+    if cells is None:
+        xs, ys = np.nonzero(dead_end_table[walls] & ~keep)
+    else:
+        xs, ys = (np.asarray(index, dtype=np.int64) for index in cells)
+    while xs.size:
+        dead = dead_end_table[walls[xs, ys]] & ~keep[xs, ys]
+        xs, ys = xs[dead], ys[dead]
+        if not xs.size:
+            break
+        flat = np.unique(xs * walls.shape[1] + ys)
+        xs, ys = flat // walls.shape[1], flat % walls.shape[1]
+
+        # Close each dead end, then its single open neighbor may be the next one
+        heading = dead_end_heading_table[walls[xs, ys]]
+        filled[xs, ys] = True
+        walls[xs, ys] = 15
+        xs = xs + heading_offset_table[heading, 0]
+        ys = ys + heading_offset_table[heading, 1]
+        np.bitwise_or.at(walls, (xs, ys), wall_bit_table[(heading + 2) % 4].astype(walls.dtype))
+    return filled
+
+
+def keep_mask(shape, cells):
+    """ Boolean mask of the given cells, for fill_dead_ends. """
+    keep = np.zeros(shape, dtype=bool)
+    for cell in cells:
+        keep[cell[0], cell[1]] = True
+    return keep
+
+
+def unit_tests():
+    """ Test that pruning keeps every route between kept cells: distances to the goal outside the filled
+        branches, the start's among them, are those of the full grid, and updating a pruned grid as walls are
+        found gives the same grid as pruning it again. """
+    from floodfill import flood_fill
+    from mazegen import generate_mazes
+    from walltables import map_walls, wall_bits, heading_offsets
+
+    random = np.random.RandomState(0)
+    for dim, loops, dead_ends in ((4, 0.0, 1.0), (8, 0.3, 1.0), (16, 0.1, 0.5), (16, 0.0, 1.0)):
+        center = dim // 2
+        goal = [(center, center), (center, center - 1), (center - 1, center), (center - 1, center - 1)]
+        keep = keep_mask((dim, dim), goal + [(0, 0)])
+        for truth in map_walls(generate_mazes(4, dim, loops, dead_ends, seed=dim)):
+            pruned = np.array(truth)
+            filled = fill_dead_ends(pruned, keep)
+            full, distance = flood_fill(truth, goal), flood_fill(pruned, goal)
+            assert distance[0, 0] == full[0, 0] > 0
+            assert (distance[~filled] == full[~filled]).all() and not distance[filled].any()
+            assert (pruned[filled] == 15).all() and not (filled & keep).any()
+            assert not (dead_end_table[pruned] & ~filled & ~keep).any()
+
+            # Reveal the walls a few cells at a time, starting from the outer walls only
+            walls = np.zeros((dim, dim), dtype=np.uint8)
+            walls[0, :] |= 8
+            walls[-1, :] |= 2
+            walls[:, 0] |= 4
+            walls[:, -1] |= 1
+            pruned = np.array(walls)
+            filled = fill_dead_ends(pruned, keep)
+            for cells in np.array_split(random.permutation(dim * dim), 5):
+                previous = np.array(walls)
+                for x, y in zip(*np.unravel_index(cells, (dim, dim))):
+                    for w in range(4):
+                        if truth[x, y] & wall_bits[w]:
+                            walls[x, y] |= wall_bits[w]
+                            nx, ny = x + heading_offsets[w][0], y + heading_offsets[w][1]
+                            if 0 <= nx < dim and 0 <= ny < dim:
+                                walls[nx, ny] |= wall_bits[(w + 2) % 4]
+                changed = np.nonzero(walls != previous)
+                pruned[changed] |= walls[changed]
+                filled |= fill_dead_ends(pruned, keep, changed)
+                expected = np.array(walls)
+                assert (filled == fill_dead_ends(expected, keep)).all()
+                assert (pruned == expected).all()
+                assert flood_fill(pruned, goal)[0, 0] == flood_fill(walls, goal)[0, 0]
+    return True
+
+
+if __name__ == '__main__':
+    unit_tests()
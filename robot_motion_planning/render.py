@@ -0,0 +1,295 @@
+"""
+Offscreen rendering of mazes and recorded robot paths, without turtle or Tk. Walls are merged into one stroke
+per run of collinear wall segments and, like the paths, painted into a NumPy RGB array, which is written as
+a binary PPM or a PNG (zlib only), or described as an SVG document. The maze background is drawn once per
+maze and copied for every run, so a batch job can render thousands of run summaries, or one frame per time
+step of a run, at array speed.
+
+Paths are the per-run location lists recorded by tester.run_trial(..., record_path=True): the first run is
+drawn in one color, the second run (the speed run) on top of it in another.
+"""
+from __future__ import print_function, division
+import numpy as np
+import argparse
+import struct
+import zlib
+import os
+
+# RGB values of the color names used by tester.py and this module
+colors = {'Black': (0, 0, 0), 'White': (255, 255, 255), 'Blue': (0, 0, 255), 'Red': (255, 0, 0),
+          'Green': (0, 128, 0), 'Orange': (255, 165, 0), 'Purple': (128, 0, 128), 'Brown': (165, 42, 42),
+          'Gray': (128, 128, 128), 'LightGray': (211, 211, 211)}
+
+# default colors of the first and second run of a path
+run_colors = ('Orange', 'Blue')
+
+
+def rgb(color):
+    """ RGB triple of a color name from colors, or of an (r, g, b) triple. """
+    if isinstance(color, str):
+        if color not in colors:
+            raise Exception('Unknown color: {}'.format(color))
+        return colors[color]
+    return tuple(color)
+
+
+def wall_edges(walls):
+    """ Closed edges of a Maze.walls grid (bit set = open) as two boolean arrays: horizontal[x, y] for the
+        edge along the bottom of row y, and vertical[x, y] for the edge along the left of column x, where the
+        last row and column index the top and right outer walls. """
+    walls = np.asarray(walls)
+    dim_x, dim_y = walls.shape
+    horizontal = np.zeros((dim_x, dim_y + 1), dtype=bool)
+    horizontal[:, 0] = walls[:, 0] & 4 == 0
+    horizontal[:, 1:] = walls & 1 == 0
+    vertical = np.zeros((dim_x + 1, dim_y), dtype=bool)
+    vertical[0, :] = walls[0, :] & 8 == 0
+    vertical[1:, :] = walls & 2 == 0
+    return horizontal, vertical
+
+
+def edge_runs(edges):
+    """ Runs of consecutive True values along the last axis of a 2D boolean array: arrays of the line index,
+        run start and run end (exclusive) of every run. """
+    padded = np.zeros((edges.shape[0], edges.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = edges
+    change = np.diff(padded, axis=1)
+    line, start = np.nonzero(change == 1)
+    stop = np.nonzero(change == -1)[1]
+    return line, start, stop
+
+
+def wall_strokes(walls):
+    """ Walls of a Maze.walls grid as the fewest straight strokes: one ((x0, y0), (x1, y1)) pair of grid corner
+        coordinates per run of collinear wall segments, the horizontal strokes first. """
+    horizontal, vertical = wall_edges(walls)
+    strokes = list()
+    for y, x0, x1 in zip(*edge_runs(horizontal.T)):
+        strokes.append(((int(x0), int(y)), (int(x1), int(y))))
+    for x, y0, y1 in zip(*edge_runs(vertical)):
+        strokes.append(((int(x), int(y0)), (int(x), int(y1))))
+    return strokes
+
+
+class Maze_image(object):
+    """
+    Pixel geometry of a rendered maze and its background image.
+
+    Attributes:
+        dim:        number of cells along each side of the maze.
+        cell_size:  pixels per cell.
+        margin:     pixels of background around the outer walls.
+        size:       width (and height) of the image in pixels.
+        wall_width: width of the wall strokes in pixels.
+        strokes:    merged wall strokes, see wall_strokes.
+        background: (size, size, 3) uint8 RGB image of the maze walls; copied, never drawn on.
+    """
+    def __init__(self, walls, cell_size=20, wall_width=2, wall_color='Black', background='White'):
+        walls = np.asarray(walls)
+        self.dim = walls.shape[0]
+        self.cell_size = cell_size
+        self.margin = cell_size // 2
+        self.size = self.dim * cell_size + 2 * self.margin
+        self.wall_width = wall_width
+        self.strokes = wall_strokes(walls)
+        self.background = np.empty((self.size, self.size, 3), dtype=np.uint8)
+        self.background[:] = rgb(background)
+        color = rgb(wall_color)
+        low = wall_width // 2
+        for start, end in self.strokes:
+            (c0, r0), (c1, r1) = self.corner_pixels(start), self.corner_pixels(end)
+            self.background[min(r0, r1) - low:max(r0, r1) - low + wall_width,
+                            min(c0, c1) - low:max(c0, c1) - low + wall_width] = color
+
+    def corner_pixels(self, corner):
+        """ (column, row) pixel of a grid corner; row 0 is the top of the image, y = 0 the bottom of the maze. """
+        return self.margin + corner[0] * self.cell_size, self.margin + (self.dim - corner[1]) * self.cell_size
+
+    def cell_pixels(self, cells):
+        """ (N, 2) array of the (column, row) pixels at the centers of N cells. """
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        half = self.cell_size // 2
+        columns = self.margin + cells[:, 0] * self.cell_size + half
+        rows = self.margin + (self.dim - 1 - cells[:, 1]) * self.cell_size + half
+        return np.stack([columns, rows], axis=1)
+
+    def image(self):
+        """ Fresh copy of the background to draw on. """
+        return self.background.copy()
+
+    def draw_path(self, image, path, color, width=None):
+        """ Paint the straight segments joining the centers of a list of cells onto image, width pixels wide
+            (by default a sixth of a cell). All segments are sampled one pixel apart in a single array pass into
+            a mask, which is widened by shifting and painted once. """
+        if width is None:
+            width = max(1, self.cell_size // 6)
+        points = self.cell_pixels(path)
+        if len(points) < 2:
+            points = np.vstack([points, points])
+        starts, deltas = points[:-1], points[1:] - points[:-1]
+        lengths = np.abs(deltas).max(axis=1)
+        counts = lengths + 1
+        segment = np.repeat(np.arange(len(starts)), counts)
+        along = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        fraction = along / np.maximum(lengths, 1)[segment]
+        pixels = np.rint(starts[segment] + deltas[segment] * fraction[:, None]).astype(np.int64)
+        line = np.zeros(image.shape[:2], dtype=bool)
+        line[pixels[:, 1], pixels[:, 0]] = True
+        mask = np.zeros_like(line)
+        low = width // 2
+        for shift in range(-low, width - low):
+            if shift >= 0:
+                mask[:, shift:] |= line[:, :line.shape[1] - shift]
+            else:
+                mask[:, :shift] |= line[:, -shift:]
+        line, mask = mask, np.zeros_like(mask)
+        for shift in range(-low, width - low):
+            if shift >= 0:
+                mask[shift:] |= line[:line.shape[0] - shift]
+            else:
+                mask[:shift] |= line[-shift:]
+        for channel, value in enumerate(rgb(color)):
+            image[:, :, channel][mask] = value # One channel at a time is several times faster than image[mask]
+        return image
+
+    def draw_marker(self, image, cell, color='Red'):
+        """ Paint a filled square half a cell wide at the center of cell. """
+        column, row = self.cell_pixels([cell])[0]
+        half = max(1, self.cell_size // 4)
+        image[max(row - half, 0):row + half, max(column - half, 0):column + half] = rgb(color)
+        return image
+
+    def render(self, paths, run_colors=run_colors):
+        """ Image of the maze with every run of paths drawn in its run color. """
+        image = self.image()
+        for path, color in zip(paths, run_colors):
+            self.draw_path(image, path, color)
+        return image
+
+    def frames(self, paths, run_colors=run_colors, every=1, marker='Red'):
+        """ Generate one image per every time steps of the runs, each showing the paths so far and a marker at
+            the robot's location; the final location always gets a frame. The trail is drawn incrementally,
+            so each frame costs one copy of the image and the newest segments. """
+        trail = self.image()
+        for path, color in zip(paths, run_colors):
+            last = 0
+            for step in range(len(path)):
+                if (step % every) and (step != len(path) - 1):
+                    continue
+                self.draw_path(trail, path[last:step + 1], color)
+                last = step
+                yield self.draw_marker(trail.copy(), path[step], marker)
+
+    def svg(self, paths=(), run_colors=run_colors, wall_color='Black', background='White'):
+        """ SVG document of the maze, one line per merged wall stroke, and one polyline per run of paths. """
+        def hex_color(color):
+            return '#{:02x}{:02x}{:02x}'.format(*rgb(color))
+        lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{0}" viewBox="0 0 {0} {0}">'.format(self.size),
+                 '<rect width="100%" height="100%" fill="{}"/>'.format(hex_color(background)),
+                 '<g stroke="{}" stroke-width="{}" stroke-linecap="square">'.format(hex_color(wall_color), self.wall_width)]
+        for start, end in self.strokes:
+            (c0, r0), (c1, r1) = self.corner_pixels(start), self.corner_pixels(end)
+            lines.append('<line x1="{}" y1="{}" x2="{}" y2="{}"/>'.format(c0, r0, c1, r1))
+        lines.append('</g>')
+        for path, color in zip(paths, run_colors):
+            points = ' '.join('{},{}'.format(column, row) for column, row in self.cell_pixels(path))
+            lines.append('<polyline points="{}" fill="none" stroke="{}" stroke-width="{}" stroke-linejoin="round"/>'.format(
+                points, hex_color(color), max(1, self.cell_size // 6)))
+        lines.append('</svg>')
+        return '\n'.join(lines) + '\n'
+
+
+def write_ppm(filename, image):
+    """ Write an RGB image as a binary PPM (P6) file. """
+    with open(filename, 'wb') as f_out:
+        f_out.write('P6\n{} {}\n255\n'.format(image.shape[1], image.shape[0]).encode('ascii'))
+        f_out.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+
+def png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+
+def write_png(filename, image, level=6):
+    """ Write an RGB image as an 8 bit PNG file, every row unfiltered. """
+    height, width = image.shape[:2]
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = np.asarray(image, dtype=np.uint8).reshape(height, -1)
+    with open(filename, 'wb') as f_out:
+        f_out.write(b'\x89PNG\r\n\x1a\n')
+        f_out.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f_out.write(png_chunk(b'IDAT', zlib.compress(raw.tobytes(), level)))
+        f_out.write(png_chunk(b'IEND', b''))
+
+
+# image writers by file format
+writers = {'ppm': write_ppm, 'png': write_png}
+formats = sorted(writers) + ['svg']
+
+
+def result_name(result):
+    """ File name stem of a batch result: maze file, algorithm and seed. """
+    stem = os.path.splitext(os.path.basename(result['maze']))[0]
+    return '{}_{}_{}'.format(stem, result['algorithm'].replace(' ', '_'), result.get('seed'))
+
+
+def render_results(results, directory, fmt='png', cell_size=20, frames=False, every=1):
+    """ Write one image per batch result holding 'maze' and 'paths' (batch_tester.batch_test(...,
+        record_path=True)) into directory, or with frames one numbered image per every time steps. Maze
+        backgrounds are built once per maze file. Returns the list of files written. """
+    from maze import Maze
+    if fmt not in formats:
+        raise Exception('Unknown image format: {}'.format(fmt))
+    if frames and fmt == 'svg':
+        raise Exception('Frame sequences are written as ppm or png images')
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    images = dict()
+    written = list()
+    for result in results:
+        if result['maze'] not in images:
+            images[result['maze']] = Maze_image(Maze(result['maze']).walls, cell_size)
+        maze_image = images[result['maze']]
+        stem = os.path.join(directory, result_name(result))
+        if fmt == 'svg':
+            with open(stem + '.svg', 'w') as f_out:
+                f_out.write(maze_image.svg(result['paths']))
+            written.append(stem + '.svg')
+        elif frames:
+            for number, image in enumerate(maze_image.frames(result['paths'], every=every)):
+                filename = '{}_{:04d}.{}'.format(stem, number, fmt)
+                writers[fmt](filename, image)
+                written.append(filename)
+        else:
+            writers[fmt](stem + '.' + fmt, maze_image.render(result['paths']))
+            written.append(stem + '.' + fmt)
+    return written
+
+
+if __name__ == '__main__':
+    """ Run every algorithm on each maze and render the paths taken, without opening a display. """
+    from batch_tester import batch_test, parallel_batch_test
+    from tester import algorithms
+
+    registry = dict((algorithms[i].__name__, algorithms[i]) for i in algorithms)
+    parser = argparse.ArgumentParser(description="Render the paths of the maze solving algorithms to image files.")
+    parser.add_argument('mazes', nargs='+', help="maze files")
+    parser.add_argument('--output', default='renders', help="output directory")
+    parser.add_argument('--format', default='png', choices=formats, help="image format")
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(registry), help="algorithm classes (default: all)")
+    parser.add_argument('--seeds', type=int, default=0, help="number of robot seeds per maze and algorithm")
+    parser.add_argument('--workers', type=int, default=1, help="number of worker processes, 0 for one per core")
+    parser.add_argument('--cell-size', type=int, default=20, help="pixels per cell")
+    parser.add_argument('--frames', action='store_true', help="write a numbered frame sequence per run")
+    parser.add_argument('--every', type=int, default=1, help="time steps per frame")
+    args = parser.parse_args()
+
+    algorithm_classes = [registry[name] for name in args.algorithms] if args.algorithms else None
+    seeds = range(args.seeds) if args.seeds else (None,)
+    if args.workers == 1:
+        results = batch_test(args.mazes, algorithm_classes, seeds, record_path=True)
+    else:
+        results = parallel_batch_test(args.mazes, algorithm_classes, seeds, max_workers=args.workers or None,
+                                      record_path=True)
+    written = render_results(results, args.output, args.format, args.cell_size, args.frames, args.every)
+    print('{} runs rendered to {} files in {}'.format(len(results), len(written), args.output))
@@ -1,5 +1,4 @@
 import numpy as np
-import turtle
 from maze import Maze
 
 if True: np.random.seed(0)
@@ -18,8 +17,10 @@ class Robot(object):
         rotation:   one of [-90, 0, 90] indicating turn or straight.
         movement:   integer from 0 - 3 inclusive, indicating the number of cells to move in the new direction.
         walls: distance to sensed walls, in cells (-1 represents blind spot)
+        random:     random number source for the default algorithm. Module level numpy state unless a seed is given.
+        recorder:   optional instrument.Step_recorder timing each phase of next_move. None disables instrumentation.
     """
-    def __init__(self, maze_dim, alg_choice="default", goal=None):
+    def __init__(self, maze_dim, alg_choice="default", goal=None, seed=None, recorder=None):
         if goal == None:
             center = maze_dim // 2
             self.goal = [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
@@ -31,6 +32,12 @@ class Robot(object):
         else:
             self.algorithm = alg_choice
             
+        if seed is None:
+            self.random = np.random
+        else:
+            self.random = np.random.RandomState(seed)
+        self.recorder = recorder
+
         self.location = (0, 0)
         self.heading = 0
         
@@ -39,14 +46,20 @@ class Robot(object):
         """ Accept sensor data and return planned rotation and movement for the current timestep. 
             Uses the algorithm defined for this robot to determine planned steps. """
         
+        recorder = self.recorder
+        if recorder: recorder.begin_step(self.algorithm)
         walls = self.decode_sensors(sensors, self.heading) # Convert sensor data into cell representation
+        if recorder: recorder.mark('decode_sensors')
         rotation, movement = self.algorithm.algorithm_choice(walls, self.heading, self.location) # Request instructions from algorithm
+        if recorder: recorder.mark('algorithm_choice')
         if rotation == 'Reset':
             self.heading = 0
             self.location = (0, 0)
+            if recorder: recorder.end_step(self.algorithm, reset=True)
             return 'Reset', 'Reset'
         self.heading = self.update_heading(rotation, heading=self.heading)
         self.location = self.update_location(movement, self.heading, self.location)
+        if recorder: recorder.end_step(self.algorithm)
         return rotation, movement
     
     
@@ -89,7 +102,7 @@ class Robot(object):
         if len(options) == 0: # This is a dead end, turn right.
             return 90, 0
         else:
-            return np.random.choice(options), 1
+            return self.random.choice(options), 1
 
     
     def unit_tests(self):
@@ -1,13 +1,24 @@
 from maze import Maze
+from render import wall_strokes
 import turtle
 import sys
 
+# robot animation levels, from the slowest to the fastest:
+#   full  - slide and turn the robot sprite in small increments (the original animation)
+#   cell  - jump the sprite from cell to cell, redrawing the screen after every cell
+#   move  - redraw the screen once per simulator step, at the robot's end position
+#   final - draw nothing while the robot runs, then the path it took once the run is over
+animation_levels = ('full', 'cell', 'move', 'final')
+
 class display_maze(object):
-    def __init__(self, testmaze, cell_size = 20):
+    def __init__(self, testmaze, cell_size = 20, animation = 'full'):
+        if animation not in animation_levels:
+            raise Exception('Unknown animation level: {}'.format(animation))
         self.maze = testmaze
         self.window = turtle.Screen()
         self.sq_size = cell_size
-        self.origin = self.maze.dim * self.sq_size / -2
+        self.origin = self.maze.dim * self.sq_size // -2
+        self.animation = animation
         self.draw_maze()
 
     def get_window(self):
@@ -25,56 +36,49 @@ class display_maze(object):
     def draw_maze(self):
         '''
         This function uses Python's turtle library to draw a picture of the maze
-        given as an argument when running the script.
+        given as an argument when running the script. Screen updates are off while
+        drawing, and each run of collinear wall segments is drawn as one stroke.
+        Only the full animation level turns screen updates back on afterwards; the
+        other levels refresh the screen explicitly.
         '''
         # configure turtle for maze drawing
+        tracer = self.window.tracer()
+        self.window.tracer(0)
         wally = turtle.RawPen(self.window)
         wally.speed(0)
         wally.hideturtle()
         wally.penup()
-        
-        # iterate through squares one by one to decide where to draw walls
-        for x in range(self.maze.dim):
-            for y in range(self.maze.dim):
-                if not self.maze.is_permissible([x,y], 'up'):
-                    wally.goto(self.origin + self.sq_size * x, self.origin + self.sq_size * (y+1))
-                    wally.setheading(0)
-                    wally.pendown()
-                    wally.forward(self.sq_size)
-                    wally.penup()
-
-                if not self.maze.is_permissible([x,y], 'right'):
-                    wally.goto(self.origin + self.sq_size * (x+1), self.origin + self.sq_size * y)
-                    wally.setheading(90)
-                    wally.pendown()
-                    wally.forward(self.sq_size)
-                    wally.penup()
 
-                # only check bottom wall if on lowest row
-                if y == 0 and not self.maze.is_permissible([x,y], 'down'):
-                    wally.goto(self.origin + self.sq_size * x, self.origin)
-                    wally.setheading(0)
-                    wally.pendown()
-                    wally.forward(self.sq_size)
-                    wally.penup()
+        for start, end in wall_strokes(self.maze.walls):
+            wally.goto(self.origin + self.sq_size * start[0], self.origin + self.sq_size * start[1])
+            wally.pendown()
+            wally.goto(self.origin + self.sq_size * end[0], self.origin + self.sq_size * end[1])
+            wally.penup()
 
-                # only check left wall if on leftmost column
-                if x == 0 and not self.maze.is_permissible([x,y], 'left'):
-                    wally.goto(self.origin, self.origin + self.sq_size * y)
-                    wally.setheading(90)
-                    wally.pendown()
-                    wally.forward(self.sq_size)
-                    wally.penup()
+        self.window.update()
+        if self.animation == 'full':
+            self.window.tracer(tracer)
 
 class display_robot(object):
-    def __init__(self, display_maze, shape="turtle", color="black", fill="green"):
+    def __init__(self, display_maze, shape="turtle", color="black", fill="green", animation=None):
         # Capture information from display_maze function needed to position robot
         self.window = display_maze
+        self.screen = self.window.get_window()
         self.cell_size = self.window.get_cell_size()
         self.origin = self.window.get_origin() + (self.cell_size // 2)
+        self.animation = self.window.animation if animation is None else animation
+        if self.animation not in animation_levels:
+            raise Exception('Unknown animation level: {}'.format(self.animation))
+        self.fill = fill
+
+        # Robot pose as last reported, and whether the sprite shows it yet
+        self.location = (0, 0)
+        self.heading = 90
+        self.placed = True
+        self.path = [self.location]
         
         # Configure pen
-        self.pen = turtle.RawPen(self.window.get_window())
+        self.pen = turtle.RawPen(self.screen)
         self.pen.hideturtle()
         self.pen.penup()
         self.pen.setheading(90)
@@ -84,8 +88,26 @@ class display_robot(object):
         self.pen.fillcolor(fill)
         self.pen.showturtle()
         self.stamp = self.pen.stamp()
+        if self.animation != 'full':
+            self.screen.update()
 
     def move_bot(self, location, heading=0):
+        """ Turn the robot by heading degrees (90 turns right) and move it to location, shown as the animation
+            level allows: animated, placed right away, or left for refresh or finish. """
+        location = tuple(location)
+        if location != self.path[-1]:
+            self.path.append(location)
+        self.location = location
+        self.heading -= heading
+        if self.animation == 'full':
+            self.animate(location, heading)
+        elif self.animation == 'cell':
+            self.place()
+            self.screen.update()
+        else:
+            self.placed = False
+
+    def animate(self, location, heading=0):
         # Find the start and end positions and orientations for the stamp
         x_start = self.pen.pos()[0]
         y_start = self.pen.pos()[1]
@@ -116,19 +138,66 @@ class display_robot(object):
                 self.pen.goto(x_start, y_start + mod*i)
             self.pen.clearstamp(self.stamp)                
             self.stamp = self.pen.stamp()
+
+    def place(self):
+        """ Jump the sprite straight to the robot's current location and heading. """
+        self.pen.setheading(self.heading)
+        self.pen.goto(self.origin + self.location[0] * self.cell_size, self.origin + self.location[1] * self.cell_size)
+        self.pen.clearstamp(self.stamp)
+        self.stamp = self.pen.stamp()
+        self.placed = True
         
     def track_bot(self, location, heading=0):
-        current_stamp = self.stamp
-        self.stamp = self.pen.stamp()
+        """ Move the robot, leaving a copy of the sprite behind; the final level draws the path instead. """
+        if self.animation != 'final':
+            if not self.placed:
+                self.place()
+            self.stamp = self.pen.stamp()
         self.move_bot(location, heading)
 
+    def refresh(self):
+        """ Called once per simulator step: at the move level, show where the step left the robot. The other
+            levels draw as they go, or only when the run is over. """
+        if self.animation == 'move' and not self.placed:
+            self.place()
+            self.screen.update()
+
+    def finish(self):
+        """ Called at the end of a run: at the final level, draw the path the robot took, one stroke per straight
+            stretch, and the robot at its last position. """
+        if self.animation != 'final':
+            return
+        corners = [self.path[0]]
+        for location in self.path[1:]:
+            if len(corners) > 1:
+                a, b = corners[-2], corners[-1]
+                ahead = (b[0] - a[0], b[1] - a[1])
+                step = (location[0] - b[0], location[1] - b[1])
+                if ahead[0] * step[1] == ahead[1] * step[0] and ahead[0] * step[0] + ahead[1] * step[1] > 0:
+                    corners[-1] = location # Still going the same way
+                    continue
+            corners.append(location)
+        pen = turtle.RawPen(self.screen)
+        pen.hideturtle()
+        pen.speed(0)
+        pen.penup()
+        pen.color(self.fill)
+        pen.width(max(1, self.cell_size // 8))
+        for n, corner in enumerate(corners):
+            pen.goto(self.origin + corner[0] * self.cell_size, self.origin + corner[1] * self.cell_size)
+            if n == 0:
+                pen.pendown()
+        self.place()
+        self.screen.update()
         
 if __name__ == '__main__':
     testmaze = Maze( str(sys.argv[1]) )
-    maze_window = display_maze(testmaze, cell_size = 40)
+    maze_window = display_maze(testmaze, cell_size = 40, animation = sys.argv[2] if len(sys.argv) > 2 else 'full')
     bot = display_robot(maze_window)
     import time
     for i in range(5):
         time.sleep(0.3)
         bot.move_bot((0, i+1))
+        bot.refresh()
+    bot.finish()
     maze_window.get_window().exitonclick() # Draw maze then exit on click
\ No newline at end of file
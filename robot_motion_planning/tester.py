@@ -1,6 +1,6 @@
 from maze import Maze
-from showmaze import display_maze, display_robot
-from algorithms import Oracle_waterfall, Algorithm, Waterfall, Search_waterfall
+from algorithms import Oracle_waterfall, Algorithm, Waterfall, Search_waterfall, Speed_waterfall, Adaptive_waterfall
+from algorithms import Frontier_explorer
 from robot import Robot
 import sys
 
@@ -19,131 +19,184 @@ dir_reverse = {'u': 'd', 'r': 'l', 'd': 'u', 'l': 'r',
 max_time = 1000
 train_score_mult = 1/30.
 
-if __name__ == '__main__':
-    """ This script tests a robot based on the code in robot.py on a maze given
-    as an argument when running the script. """
+# algorithms under test, in evaluation order, and the colors used to draw them
+algorithms = {0:Oracle_waterfall, 1:Algorithm, 2:Waterfall, 3:Search_waterfall, 4:Speed_waterfall,
+              5:Adaptive_waterfall, 6:Frontier_explorer}
+color = {0:"Blue", 1:"Red", 2:"Green", 3:"Orange", 4:"Purple", 5:"Brown", 6:"Gray"}
+
+
+def run_trial(testmaze, algorithm_class, draw_maze=None, fill="Black", verbose=True, seed=None, robot_class=Robot,
+              record_path=False, algorithm_options=None):
+    """ Score one algorithm over two runs on the given maze.
+
+        The showmaze module (and with it turtle) is only imported when a draw_maze
+        window is provided, so headless callers never touch Tk. Returns a dictionary
+        holding the algorithm name, the step count of each completed run, the score,
+        whether the time limit was exceeded, the number of moves stopped by a wall and
+        the total number of time steps used. A seed gives the robot its own random state
+        instead of the module level one; only the default random walker of Robot, run when
+        algorithm_class is None, uses it, as the algorithms are all deterministic.
+        robot_class allows a Robot subclass to be tested. algorithm_options holds extra keyword arguments for
+        the algorithm constructor, such as the plan_cache of Oracle_waterfall.
+        With record_path the result also holds 'paths': for each run started, the list of
+        (x, y) locations of the robot at the start and after every time step. """
+
+    def report(message):
+        if verbose: print(message)
+
+    if draw_maze is not None:
+        from showmaze import display_robot
 
-    draw = True
-    
-    # Create a maze based on input argument on command line.
-    testmaze = Maze( str(sys.argv[1]))
-    
-    if draw: draw_maze = display_maze(testmaze, 40)
-    algorithms = {0:Oracle_waterfall, 1:Algorithm, 2:Waterfall, 3:Search_waterfall}
-    color = {0:"Blue", 1:"Red", 2:"Green", 3:"Orange"}
     maze_dim = testmaze.get_dim()
     center = maze_dim // 2
     goal = [(center, center), (center, center-1), (center-1, center), (center-1, center-1)]
-    
-    for i in range(0, 4):
-        # Intitialize a robot; robot receives info about maze dimensions.
-        algorithm = algorithms[i](maze_dim, goal)
-        testrobot = Robot(testmaze.get_dim(), algorithm)
-        if algorithm.get_name() == "Oracle Waterfall": 
+
+    # Intitialize a robot; robot receives info about maze dimensions.
+    if algorithm_class is None: # The robot's own seeded random walker
+        testrobot = robot_class(maze_dim, seed=seed)
+        name = "Default Robot"
+    else:
+        algorithm = algorithm_class(maze_dim, goal, **(algorithm_options or {}))
+        testrobot = robot_class(maze_dim, algorithm, seed=seed)
+        name = algorithm.get_name()
+        if name == "Oracle Waterfall":
             _ = algorithm.maze_oracle(testmaze) #If the algorithm under test is the oracle, give it the maze.
-        if draw: draw_robot = display_robot(draw_maze, fill=color[i])
-
-        # Record robot performance over two runs.
-        runtimes = []
-        total_time = 0
-        print "*"*30
-        for run in range(2):
-            print "Starting ", algorithm.get_name(), " run {}, ".format(run)
-
-            # Set the robot in the start position. Note that robot position
-            # parameters are independent of the robot itself.
-            robot_pos = {'location': [0, 0], 'heading': 'up'}
-
-            run_active = True
-            hit_goal = False
-            while run_active:
-                # check for end of time
-                total_time += 1
-                if total_time > max_time:
+
+    # Record robot performance over two runs.
+    runtimes = []
+    total_time = 0
+    timeout = False
+    wall_bumps = 0
+    paths = list()
+    goal_bounds = [maze_dim//2 - 1, maze_dim//2]
+    report("*"*30)
+    for run in range(2):
+        report("Starting {} run {}, ".format(name, run))
+
+        # Set the robot in the start position. Note that robot position
+        # parameters are independent of the robot itself.
+        robot_pos = {'location': [0, 0], 'heading': 'up'}
+        if record_path: paths.append([tuple(robot_pos['location'])])
+        if draw_maze is not None: draw_robot = display_robot(draw_maze, fill=fill)
+
+        run_active = True
+        hit_goal = False
+        while run_active:
+            # check for end of time
+            total_time += 1
+            if total_time > max_time:
+                run_active = False
+                timeout = True
+                report("Allotted time exceeded.")
+                break
+
+            # provide robot with sensor information, get actions
+            sensing = testmaze.dist_to_walls([robot_pos['location']] * 3,
+                                             dir_sensors[robot_pos['heading']]).tolist()
+            rotation, movement = testrobot.next_move(sensing)
+
+            # check for a reset
+            if (rotation, movement) == ('Reset', 'Reset'):
+                if run == 0 and hit_goal:
                     run_active = False
-                    print "Allotted time exceeded."
+                    runtimes.append(total_time)
+                    report("Ending first run. Starting next run.")
+                    recorder = getattr(testrobot, 'recorder', None)
+                    if recorder: recorder.start_run()
                     break
+                elif run == 0 and not hit_goal:
+                    report("Cannot reset - robot has not hit goal yet.")
+                    continue
+                else:
+                    report("Cannot reset on runs after the first.")
+                    continue
 
-                # provide robot with sensor information, get actions
-                sensing = [testmaze.dist_to_wall(robot_pos['location'], heading)
-                           for heading in dir_sensors[robot_pos['heading']]]
-                rotation, movement = testrobot.next_move(sensing)
-
-                # check for a reset
-                if (rotation, movement) == ('Reset', 'Reset'):
-                    if run == 0 and hit_goal:
-                        run_active = False
-                        runtimes.append(total_time)
-                        if draw: draw_robot = display_robot(draw_maze, fill=color[i])
-                        print "Ending first run. Starting next run."
-                        break
-                    elif run == 0 and not hit_goal:
-                        print "Cannot reset - robot has not hit goal yet."
-                        continue
+            # perform rotation
+            if rotation == -90:
+                robot_pos['heading'] = dir_sensors[robot_pos['heading']][0]
+                if draw_maze is not None: draw_robot.move_bot(robot_pos['location'], rotation)
+            elif rotation == 90:
+                robot_pos['heading'] = dir_sensors[robot_pos['heading']][2]
+                if draw_maze is not None: draw_robot.move_bot(robot_pos['location'], rotation)
+            elif rotation == 0:
+                pass
+            else:
+                report("Invalid rotation value, no rotation performed.")
+
+            # perform movement
+            if abs(movement) > 3:
+                report("Movement limited to three squares in a turn.")
+            movement = max(min(int(movement), 3), -3) # fix to range [-3, 3]
+            while movement:
+                if movement > 0:
+                    if testmaze.is_permissible(robot_pos['location'], robot_pos['heading']):
+                        robot_pos['location'][0] += dir_move[robot_pos['heading']][0]
+                        robot_pos['location'][1] += dir_move[robot_pos['heading']][1]
+                        movement -= 1
                     else:
-                        print "Cannot reset on runs after the first."
-                        continue
-
-                # perform rotation
-                if rotation == -90:
-                    robot_pos['heading'] = dir_sensors[robot_pos['heading']][0]
-                    if draw:
-                        if run == 0:
-                            draw_robot.move_bot(robot_pos['location'], rotation)
-                        else:
-                            draw_robot.move_bot(robot_pos['location'], rotation)
-                elif rotation == 90:
-                    robot_pos['heading'] = dir_sensors[robot_pos['heading']][2]
-                    if draw: 
-                        if run == 0:
-                            draw_robot.move_bot(robot_pos['location'], rotation)
-                        else:
-                            draw_robot.move_bot(robot_pos['location'], rotation)
-                elif rotation == 0:
-                    pass
+                        report("Movement stopped by wall.")
+                        wall_bumps += 1
+                        movement = 0
                 else:
-                    print "Invalid rotation value, no rotation performed."
-
-                # perform movement
-                if abs(movement) > 3:
-                    print "Movement limited to three squares in a turn."
-                movement = max(min(int(movement), 3), -3) # fix to range [-3, 3]
-                while movement:
-                    if movement > 0:
-                        if testmaze.is_permissible(robot_pos['location'], robot_pos['heading']):
-                            robot_pos['location'][0] += dir_move[robot_pos['heading']][0]
-                            robot_pos['location'][1] += dir_move[robot_pos['heading']][1]
-                            movement -= 1
-                        else:
-                            print "Movement stopped by wall."
-                            movement = 0
+                    rev_heading = dir_reverse[robot_pos['heading']]
+                    if testmaze.is_permissible(robot_pos['location'], rev_heading):
+                        robot_pos['location'][0] += dir_move[rev_heading][0]
+                        robot_pos['location'][1] += dir_move[rev_heading][1]
+                        movement += 1
+                    else:
+                        report("Movement stopped by wall.")
+                        wall_bumps += 1
+                        movement = 0
+                if draw_maze is not None:
+                    if run == 0:
+                        draw_robot.move_bot(location=robot_pos['location'])
                     else:
-                        rev_heading = dir_reverse[robot_pos['heading']]
-                        if testmaze.is_permissible(robot_pos['location'], rev_heading):
-                            robot_pos['location'][0] += dir_move[rev_heading][0]
-                            robot_pos['location'][1] += dir_move[rev_heading][1]
-                            movement += 1
-                        else:
-                            print "Movement stopped by wall."
-                            movement = 0
-                    if draw: 
-                        if run == 0:
-                            draw_robot.move_bot(location=robot_pos['location'])
-                        else:
-                            draw_robot.track_bot(location=robot_pos['location'])
-
-                # check for goal entered
-                goal_bounds = [testmaze.dim/2 - 1, testmaze.dim/2]
-                if robot_pos['location'][0] in goal_bounds and robot_pos['location'][1] in goal_bounds:
-                    hit_goal = True
-                    if run != 0:
-                        runtimes.append(total_time - sum(runtimes))
-                        run_active = False
-                        print "Goal found; run {} completed!".format(run)
-
-        # Report score if robot is successful.
-        if len(runtimes) == 2:
-            print "Task complete! Score: {:4.3f}".format(runtimes[1] + train_score_mult*runtimes[0])
-
-    print "*"*30
-    draw_maze.get_window().exitonclick() # Draw maze then exit on click
\ No newline at end of file
+                        draw_robot.track_bot(location=robot_pos['location'])
+            if record_path: paths[-1].append(tuple(robot_pos['location']))
+            if draw_maze is not None: draw_robot.refresh() # One screen update per step, as the animation level allows
+
+            # check for goal entered
+            if robot_pos['location'][0] in goal_bounds and robot_pos['location'][1] in goal_bounds:
+                hit_goal = True
+                if run != 0:
+                    runtimes.append(total_time - sum(runtimes))
+                    run_active = False
+                    report("Goal found; run {} completed!".format(run))
+        if draw_maze is not None: draw_robot.finish()
+
+    # Report score if robot is successful.
+    score = None
+    if len(runtimes) == 2:
+        score = runtimes[1] + train_score_mult*runtimes[0]
+        report("Task complete! Score: {:4.3f}".format(score))
+
+    result = {'algorithm': name,
+              'run_1': runtimes[0] if len(runtimes) > 0 else None,
+              'run_2': runtimes[1] if len(runtimes) > 1 else None,
+              'score': score,
+              'timeout': timeout,
+              'wall_bumps': wall_bumps,
+              'steps': min(total_time, max_time)}
+    if record_path:
+        result['paths'] = paths
+    return result
+
+
+if __name__ == '__main__':
+    """ This script tests a robot based on the code in robot.py on a maze given
+    as an argument when running the script. An optional second argument picks the
+    animation level of the display (see showmaze.animation_levels). """
+    from showmaze import display_maze
+
+    draw = True
+
+    # Create a maze based on input argument on command line.
+    testmaze = Maze( str(sys.argv[1]))
+
+    animation = sys.argv[2] if len(sys.argv) > 2 else 'full'
+    draw_maze = display_maze(testmaze, 40, animation) if draw else None
+    for i in range(len(algorithms)):
+        run_trial(testmaze, algorithms[i], draw_maze, fill=color[i])
+
+    print("*"*30)
+    if draw: draw_maze.get_window().exitonclick() # Draw maze then exit on click
@@ -0,0 +1,51 @@
+"""
+Lookup tables for the 4-bit wall encoding used by the algorithms, where bit 2**heading is set
+when a cell has a wall at that heading (North, East, South, West = 1, 2, 4, 8). Tables indexed by
+cell value cover all 16 values, so wall tests become a single index or bitwise operation.
+"""
+import numpy as np
+
+# bit value of the wall at each heading
+wall_bits = (1, 2, 4, 8)
+
+# coordinate transformation that moves a location one cell in the direction of each heading
+heading_offsets = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# change in heading caused by each rotation
+rotation_deltas = {-90: 3, 0: 0, 90: 1}
+
+# rotation between two headings, indexed [heading][new_heading]; "None" for a reversal
+heading_rotations = tuple(tuple({0: 0, 1: 90, 3: -90}.get((new_heading - heading) % 4, "None")
+                                for new_heading in range(4))
+                          for heading in range(4))
+
+# wall bits present in each cell value, lowest bit first
+cell_walls = tuple(tuple(bit for bit in wall_bits if cell & bit) for cell in range(16))
+
+# bit mask of the passable headings of each cell value
+passable = tuple(~cell & 15 for cell in range(16))
+
+# headings without a wall for each cell value
+open_headings = tuple(tuple(h for h in range(4) if not cell & wall_bits[h]) for cell in range(16))
+
+# cell values with exactly one open side: 7, 11, 13 and 14
+dead_end = tuple(len(open_headings[cell]) == 1 for cell in range(16))
+
+# array forms of the tables for vectorized lookups over whole maps
+passable_table = np.array(passable, dtype=np.uint8)
+dead_end_table = np.array(dead_end, dtype=bool)
+# the one open heading of each dead-end cell value, 0 for other values
+dead_end_heading_table = np.array([open_headings[cell][0] if dead_end[cell] else 0 for cell in range(16)],
+                                  dtype=np.int64)
+heading_offset_table = np.array(heading_offsets, dtype=np.int64)
+wall_bit_table = np.array(wall_bits, dtype=np.uint8)
+
+
+def map_walls(walls, out=None):
+    """ Translate wall grids from the Maze.walls encoding (bit set = open side) to the encoding above
+        (bit set = wall) in one array operation. The bit order is the same, so this is the complement.
+        out optionally names an array, such as a map layer, to write the result into in place. Walls of any
+        other dtype than uint8 are cast first, which makes a temporary copy. """
+    out = np.invert(np.asarray(walls, dtype=np.uint8), out=out)
+    out &= 15
+    return out